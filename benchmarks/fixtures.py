@@ -0,0 +1,88 @@
+import random
+import tempfile
+from typing import Dict, List, Tuple
+
+# Number of statements in the body of the generated functions
+BUCKETS: Dict[str, int] = {
+    'short': 2,
+    'medium': 8,
+    'long': 24,
+}
+
+OPERATORS = ('+', '-', '*')
+
+
+def make_snippet(num_statements: int, rng: random.Random) -> str:
+    """A syntactically valid Python function with ``num_statements`` statements in its body."""
+    lines = [f"def compute_{rng.randrange(1000)}(a, b):", "    total = a + b"]
+    for i in range(num_statements):
+        op = rng.choice(OPERATORS)
+        kind = rng.random()
+        if kind < 0.2:
+            lines.append(f"    if total > {rng.randrange(100)}:")
+            lines.append(f"        total = total {op} {i + 1}")
+        elif kind < 0.3:
+            lines.append(f"    while total < {rng.randrange(100)}:")
+            lines.append("        total = total + 1")
+        else:
+            lines.append(f"    v{i} = total {op} b")
+            lines.append(f"    total = v{i} {rng.choice(OPERATORS)} a")
+    lines.append("    return total")
+    return "\n".join(lines)
+
+
+def make_snippets(bucket: str, count: int, seed: int = 0) -> List[str]:
+    rng = random.Random(f"{seed}-{bucket}")
+    return [make_snippet(BUCKETS[bucket], rng) for _ in range(count)]
+
+
+def perturb(code: str, rng: random.Random, rate: float = 0.1) -> str:
+    """Swap a fraction of the operators of code, keeping it valid."""
+    tokens = code.split(' ')
+    for i, token in enumerate(tokens):
+        if token in OPERATORS and rng.random() < rate * 3:
+            tokens[i] = rng.choice([op for op in OPERATORS if op != token])
+    return ' '.join(tokens)
+
+
+def build_tiny_t5(seed: int = 0, d_model: int = 64, num_layers: int = 2) -> Tuple[object, object]:
+    """
+    A small randomly initialized T5 with a byte-level BPE tokenizer, built without network access.
+
+    The tokenizer is trained on generated snippets of every bucket, so the
+    token counts per bucket are close to those of a real code tokenizer.
+
+    Returns:
+        (model, tokenizer)
+    """
+    import torch
+    from tokenizers import ByteLevelBPETokenizer
+    from transformers import RobertaTokenizerFast, T5Config, T5ForConditionalGeneration
+
+    corpus = [snippet for bucket in BUCKETS for snippet in make_snippets(bucket, 20, seed)]
+
+    with tempfile.TemporaryDirectory() as path:
+        bpe = ByteLevelBPETokenizer()
+        bpe.train_from_iterator(
+            corpus, vocab_size=512, min_frequency=1,
+            special_tokens=["<s>", "<pad>", "</s>", "<unk>", "<mask>"]
+        )
+        bpe.save_model(path)
+        tokenizer = RobertaTokenizerFast.from_pretrained(path)
+
+    torch.manual_seed(seed)
+    config = T5Config(
+        vocab_size=len(tokenizer),
+        d_model=d_model,
+        d_kv=d_model // 4,
+        d_ff=d_model * 2,
+        num_layers=num_layers,
+        num_heads=4,
+        pad_token_id=tokenizer.pad_token_id,
+        eos_token_id=tokenizer.eos_token_id,
+        decoder_start_token_id=tokenizer.pad_token_id,
+    )
+    model = T5ForConditionalGeneration(config)
+    model.generation_config.max_length = 32
+    model.eval()
+    return model, tokenizer
@@ -0,0 +1,386 @@
+import argparse
+import functools
+import json
+import os
+import platform
+import random
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from benchmarks.fixtures import BUCKETS, build_tiny_t5, make_snippets, perturb
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+# Methods of CodeAttack timed as stages; nested stages include the time of their children
+ATTACK_STAGES = {
+    '_generate_outputs': 'generate_outputs',
+    '_build_importance_contexts': 'importance',
+    '_generate_adversarial': 'search',
+    '_score_candidates': 'candidate_scoring',
+}
+
+# Relative drop in throughput reported as a regression
+REGRESSION_TOLERANCE = 0.1
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far, in MiB, or None where it cannot be read."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def summarize(latencies: List[float]) -> Dict[str, float]:
+    if not latencies:
+        return {'count': 0}
+    values = np.asarray(latencies)
+    return {
+        'count': len(values),
+        'total': float(values.sum()),
+        'mean': float(values.mean()),
+        'p50': float(np.percentile(values, 50)),
+        'p90': float(np.percentile(values, 90)),
+        'p99': float(np.percentile(values, 99)),
+    }
+
+
+class StageTimer:
+    """
+    Latencies of named stages, recorded by wrapping methods of an object or with ``stage``.
+    """
+
+    def __init__(self):
+        self.timings = defaultdict(list)
+        self._wrapped = []
+
+    def wrap(self, obj: Any, method_name: str, stage: str):
+        original = getattr(obj, method_name)
+        self._wrapped.append((obj, method_name, obj.__dict__.get(method_name)))
+
+        @functools.wraps(original)
+        def timed(*args, **kwargs):
+            with self.stage(stage):
+                return original(*args, **kwargs)
+
+        setattr(obj, method_name, timed)
+
+    def restore(self):
+        """Undo every ``wrap``, most recent first."""
+        while self._wrapped:
+            obj, method_name, previous = self._wrapped.pop()
+            if previous is None:
+                delattr(obj, method_name)
+            else:
+                setattr(obj, method_name, previous)
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name].append(time.perf_counter() - start)
+
+    def clear(self):
+        self.timings.clear()
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        return {stage: summarize(latencies) for stage, latencies in self.timings.items()}
+
+
+def benchmark_attack(attack, snippets: List[str], batch_size: int = 1) -> Dict[str, Any]:
+    """
+    Run ``CodeAttack.generate_batch`` over snippets and time every stage.
+
+    The first snippet is attacked once beforehand as a warm-up and not counted.
+    """
+    timer = StageTimer()
+    for method_name, stage in ATTACK_STAGES.items():
+        timer.wrap(attack, method_name, stage)
+
+    try:
+        attack.generate_batch(snippets[:1], batch_size=1)
+        timer.clear()
+
+        start = time.perf_counter()
+        for offset in range(0, len(snippets), batch_size):
+            with timer.stage('batch'):
+                attack.generate_batch(snippets[offset:offset + batch_size], batch_size=batch_size)
+        seconds = time.perf_counter() - start
+    finally:
+        timer.restore()
+
+    return {
+        'samples': len(snippets),
+        'batch_size': batch_size,
+        'seconds': seconds,
+        'samples_per_second': len(snippets) / seconds if seconds else float('inf'),
+        'stages': timer.summary(),
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def _time(fn: Callable[[], Any], samples: int, repeats: int) -> Dict[str, Any]:
+    fn()
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+
+    result = {'samples': samples, 'latency': summarize(latencies)}
+    result['samples_per_second'] = samples / result['latency']['p50'] if result['latency']['p50'] else float('inf')
+    return result
+
+
+def benchmark_metrics(
+    model,
+    tokenizer,
+    originals: List[str],
+    adversarials: List[str],
+    repeats: int = 3
+) -> Dict[str, Any]:
+    """Time every metric function on the (original, adversarial) pairs of one bucket."""
+    import torch
+
+    from src.evaluation.bleu import ReferenceBLEU
+    from src.evaluation.corpus_codebleu import CodeBLEUEvaluator
+    from src.utils.metrics import (
+        SimilarityEngine,
+        calculate_embedding_similarity,
+        calculate_model_metrics,
+        calculate_similarity,
+    )
+
+    def embed(codes: List[str]) -> torch.Tensor:
+        # Mean-pooled encoder states, as a stand-in for snippet embeddings
+        inputs = tokenizer(codes, padding=True, truncation=True, return_tensors='pt')
+        with torch.inference_mode():
+            states = model.get_encoder()(**inputs).last_hidden_state
+        mask = inputs['attention_mask'].unsqueeze(-1)
+        return (states * mask).sum(dim=1) / mask.sum(dim=1)
+
+    original_embeddings = embed(originals)
+    adversarial_embeddings = embed(adversarials)
+
+    functions = {
+        'similarity': lambda: [calculate_similarity(o, a) for o, a in zip(originals, adversarials)],
+        'similarity_engine': lambda: [SimilarityEngine(o).score(a) for o, a in zip(originals, adversarials)],
+        'reference_bleu': lambda: [ReferenceBLEU(o).score(a) for o, a in zip(originals, adversarials)],
+        'codebleu': lambda: CodeBLEUEvaluator().evaluate(originals, adversarials),
+        'model_metrics': lambda: calculate_model_metrics(adversarials, originals, tokenizer),
+        'embedding_similarity': lambda: calculate_embedding_similarity(original_embeddings, adversarial_embeddings),
+    }
+
+    results = {}
+    for name, fn in functions.items():
+        try:
+            results[name] = _time(fn, len(originals), repeats)
+        except ImportError as e:
+            # codebleu and its tree-sitter grammars are optional here
+            results[name] = {'skipped': str(e)}
+    results['peak_rss_mb'] = peak_rss_mb()
+    return results
+
+
+def run(
+    buckets: List[str],
+    samples: int = 8,
+    batch_size: int = 1,
+    repeats: int = 3,
+    seed: int = 0,
+    skip_attack: bool = False
+) -> Dict[str, Any]:
+    import torch
+    import transformers
+
+    from src.attacks.attack import CodeAttack
+
+    model, tokenizer = build_tiny_t5(seed=seed)
+    attack = CodeAttack(model=model, tokenizer=tokenizer)
+
+    results = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'torch': torch.__version__,
+            'transformers': transformers.__version__,
+            'threads': torch.get_num_threads(),
+            'device': str(attack.device),
+            'samples': samples,
+            'batch_size': batch_size,
+            'repeats': repeats,
+            'seed': seed,
+        },
+        'buckets': {},
+        'attack': {},
+        'metrics': {},
+    }
+
+    for bucket in buckets:
+        snippets = make_snippets(bucket, samples, seed)
+        rng = random.Random(f"{seed}-{bucket}-perturb")
+        adversarials = [perturb(code, rng) for code in snippets]
+
+        results['buckets'][bucket] = {
+            'statements': BUCKETS[bucket],
+            'mean_tokens': float(np.mean([len(tokenizer.tokenize(code)) for code in snippets])),
+        }
+        if not skip_attack:
+            results['attack'][bucket] = benchmark_attack(attack, snippets, batch_size=batch_size)
+        results['metrics'][bucket] = benchmark_metrics(model, tokenizer, snippets, adversarials, repeats=repeats)
+
+    return results
+
+
+def _throughputs(results: Dict[str, Any]) -> Dict[str, float]:
+    throughputs = {}
+    for bucket, result in results.get('attack', {}).items():
+        throughputs[f'attack/{bucket}'] = result['samples_per_second']
+    for bucket, metrics in results.get('metrics', {}).items():
+        for name, result in metrics.items():
+            if isinstance(result, dict) and 'samples_per_second' in result:
+                throughputs[f'metrics/{bucket}/{name}'] = result['samples_per_second']
+    return throughputs
+
+
+def compare(
+    results: Dict[str, Any],
+    baseline: Dict[str, Any],
+    tolerance: float = REGRESSION_TOLERANCE
+) -> List[Dict[str, Any]]:
+    """
+    Throughput of every benchmark present in both runs, relative to the baseline.
+
+    Returns:
+        One entry per benchmark with both throughputs, their ratio and
+        whether the drop exceeds ``tolerance``
+    """
+    current = _throughputs(results)
+    previous = _throughputs(baseline)
+
+    rows = []
+    for name in sorted(current.keys() & previous.keys()):
+        ratio = current[name] / previous[name] if previous[name] else float('inf')
+        rows.append({
+            'benchmark': name,
+            'baseline': previous[name],
+            'current': current[name],
+            'ratio': ratio,
+            'regression': ratio < 1 - tolerance,
+        })
+    return rows
+
+
+def format_report(results: Dict[str, Any], comparison: List[Dict[str, Any]] = None) -> str:
+    lines = []
+    for bucket, info in results['buckets'].items():
+        lines.append(f"{bucket} ({info['mean_tokens']:.0f} tokens)")
+
+        attack = results['attack'].get(bucket)
+        if attack:
+            lines.append(f"  attack: {attack['samples_per_second']:.2f} samples/s")
+            for stage, summary in attack['stages'].items():
+                if summary['count']:
+                    lines.append(
+                        f"    {stage:<18} p50 {summary['p50'] * 1000:9.1f} ms  "
+                        f"p90 {summary['p90'] * 1000:9.1f} ms  p99 {summary['p99'] * 1000:9.1f} ms"
+                    )
+
+        for name, result in results['metrics'].get(bucket, {}).items():
+            if not isinstance(result, dict):
+                continue
+            if 'skipped' in result:
+                lines.append(f"  {name}: skipped ({result['skipped']})")
+            else:
+                lines.append(f"  {name}: {result['samples_per_second']:.1f} samples/s")
+
+    rss = [
+        section[bucket]['peak_rss_mb']
+        for section in (results['attack'], results['metrics'])
+        for bucket in section
+        if section[bucket].get('peak_rss_mb') is not None
+    ]
+    if rss:
+        lines.append(f"peak RSS: {max(rss):.0f} MiB")
+
+    if comparison:
+        lines.append("compared with baseline:")
+        for row in comparison:
+            flag = '  REGRESSION' if row['regression'] else ''
+            lines.append(f"  {row['benchmark']:<40} {row['ratio']:6.2f}x{flag}")
+
+    return '\n'.join(lines)
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark CodeAttack and the metrics offline on a tiny T5')
+    parser.add_argument('--buckets', nargs='+', choices=list(BUCKETS), default=list(BUCKETS),
+                        help='Snippet-length buckets to run')
+    parser.add_argument('--samples', type=int, default=8,
+                        help='Number of snippets per bucket')
+    parser.add_argument('--batch-size', type=int, default=1,
+                        help='Batch size of CodeAttack.generate_batch')
+    parser.add_argument('--repeats', type=int, default=3,
+                        help='Number of timed runs of every metric function')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Seed of the snippets and of the model weights')
+    parser.add_argument('--threads', type=int, default=None,
+                        help='Number of torch threads')
+    parser.add_argument('--skip-attack', action='store_true',
+                        help='Only benchmark the metric functions')
+    parser.add_argument('--output', default=None,
+                        help='Path of the JSON results (default: benchmarks/results/<timestamp>.json)')
+    parser.add_argument('--baseline', default=None,
+                        help='JSON results of an earlier run to compare throughput with')
+    parser.add_argument('--tolerance', type=float, default=REGRESSION_TOLERANCE,
+                        help='Relative throughput drop reported as a regression')
+    args = parser.parse_args(argv)
+
+    if args.threads is not None:
+        import torch
+        torch.set_num_threads(args.threads)
+
+    results = run(
+        args.buckets,
+        samples=args.samples,
+        batch_size=args.batch_size,
+        repeats=args.repeats,
+        seed=args.seed,
+        skip_attack=args.skip_attack
+    )
+
+    comparison = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            comparison = compare(results, json.load(f), args.tolerance)
+        results['comparison'] = comparison
+
+    output = args.output or os.path.join(RESULTS_DIR, time.strftime('%Y%m%d-%H%M%S') + '.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+
+    print(format_report(results, comparison))
+    print(f"results saved to {output}")
+
+    return 1 if comparison and any(row['regression'] for row in comparison) else 0
+
+
+if __name__ == '__main__':
+    # Everything is built locally; never reach for the hub
+    os.environ.setdefault('HF_HUB_OFFLINE', '1')
+    sys.exit(main())
@@ -6,10 +6,10 @@ from pathlib import Path
 current_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(current_dir)
 
-from src.attacks.attack import CodeAttack
-from src.evaluation.metrics import calculate_attack_metrics
-from src.utils.data_loader import load_dataset
-from src.utils.model_loader import load_model
+from src.utils.metrics import IncrementalAttackMetrics
+from src.utils.file_utils import JsonlResultsWriter, load_results, repair_results
+from src.utils.data_loader import JsonlDataset, load_dataset, shard_bounds
+from src.utils.runner import iter_attack_results, parse_shard
 
 def parse_args():
     parser = argparse.ArgumentParser(description='CodeAttack: Code-Based Adversarial Attacks')
@@ -21,38 +21,88 @@ def parse_args():
                       help='Maximum number of perturbations allowed')
     parser.add_argument('--similarity_threshold', type=float, default=0.5,
                       help='Minimum similarity threshold for adversarial examples')
+    parser.add_argument('--beam_width', type=int, default=4,
+                      help='Number of beams kept when combining perturbations')
+    parser.add_argument('--batch_size', type=int, default=8,
+                      help='Number of snippets attacked together in one batch')
+    parser.add_argument('--precision', type=str, default='fp32', choices=['fp32', 'bf16'],
+                      help='Precision profile for inference; the gradient pass always runs in fp32')
+    parser.add_argument('--precision_report', type=int, default=0,
+                      help='Compare fp32 and bf16 on the first N snippets and report the differences')
+    parser.add_argument('--quantized_screening', action='store_true',
+                      help='Rank candidates with an int8 copy of the model and re-verify the top few in full precision')
+    parser.add_argument('--workers', type=int, default=1,
+                      help='Number of worker processes, each with its own copy of the model')
+    parser.add_argument('--shard', type=str, default=None,
+                      help='Only attack shard i of k of the dataset, given as i/k')
+    parser.add_argument('--flush_every', type=int, default=64,
+                      help='Number of results buffered before they are flushed to results.jsonl')
+    parser.add_argument('--resume', action='store_true',
+                      help='Continue after the results already in output_dir/results.jsonl')
     parser.add_argument('--output_dir', type=str, default='results',
                       help='Directory to save results')
     return parser.parse_args()
 
+def get_code(item):
+    return item['code'] if isinstance(item, dict) else item
+
 def main():
     args = parse_args()
     
     output_dir = Path(args.output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
     
-    model, tokenizer = load_model(args.model_name)
-    
     dataset = load_dataset(args.dataset_name)
     
-    attack = CodeAttack(
-        model=model,
-        tokenizer=tokenizer,
-        max_perturbations=args.max_perturbations,
-        similarity_threshold=args.similarity_threshold
-    )
+    start, end = 0, len(dataset)
+    if args.shard:
+        start, end = shard_bounds(len(dataset), *parse_shard(args.shard))
     
-    results = []
-    for code in dataset:
-        result = attack.generate(code)
-        results.append(result)
-        
-        print(f"\nCode gốc:\n{result['original_code']}")
-        print(f"\nCode đã bị tấn công:\n{result['adversarial_code']}")
-        print(f"\nSố token đã thay đổi: {result['perturbations']}")
-        print(f"Độ tương đồng: {result['similarity']:.2f}")
+    metrics = IncrementalAttackMetrics()
+    screening = {'rankings': 0, 'disagreements': 0}
+    results_path = output_dir / 'results.jsonl'
+    if args.resume and results_path.exists():
+        # A crash mid-write leaves a partial last line; drop it so only complete results count
+        repair_results(results_path)
+        for result in load_results(results_path):
+            metrics.update(result)
+        start += metrics.count
+    
+    if isinstance(dataset, JsonlDataset):
+        records = dataset.iter_range(start, end)
+    else:
+        records = dataset[start:end]
+    
+    codes = (get_code(item) for item in records)
+    
+    attack_kwargs = {
+        'max_perturbations': args.max_perturbations,
+        'similarity_threshold': args.similarity_threshold,
+        'beam_width': args.beam_width,
+        'precision': args.precision,
+        'quantized_screening': args.quantized_screening
+    }
     
-    metrics = calculate_attack_metrics(results)
+    with JsonlResultsWriter(results_path, buffer_size=args.flush_every, append=args.resume) as writer:
+        for result in iter_attack_results(
+            codes,
+            args.model_name,
+            attack_kwargs,
+            workers=args.workers,
+            batch_size=args.batch_size
+        ):
+            writer.write(result)
+            metrics.update(result)
+            for key, value in result.get('screening', {}).items():
+                screening[key] += value
+            
+            print(f"\nCode gốc:\n{result['original_code']}")
+            print(f"\nCode đã bị tấn công:\n{result['adversarial_code']}")
+            print(f"\nSố token đã thay đổi: {result['perturbations']}")
+            print(f"Độ tương đồng: {result['similarity']:.2f}")
+    
+    num_results = metrics.count
+    metrics = metrics.compute()
     
     print("\nAttack Metrics:")
     print(f"Performance drop: {metrics['performance_drop']:.2f}")
@@ -60,13 +110,43 @@ def main():
     print(f"Code similarity: {metrics['code_similarity']:.2f}")
     print(f"Average perturbations: {metrics['avg_perturbations']:.2f}")
     
+    summary = {
+        'args': vars(args),
+        'metrics': metrics,
+        'num_results': num_results
+    }
+    
+    if args.quantized_screening:
+        screening['disagreement_rate'] = (
+            screening['disagreements'] / screening['rankings'] if screening['rankings'] else 0.0
+        )
+        print(f"\nQuantized screening disagreement rate: {screening['disagreement_rate']:.2f}")
+        summary['screening'] = screening
+    
+    if args.precision_report > 0:
+        from src.evaluation.precision import compare_precision_profiles
+        from src.utils.model_loader import load_model
+        
+        model, tokenizer = load_model(args.model_name)
+        sample = [get_code(dataset[i]) for i in range(min(args.precision_report, len(dataset)))]
+        report = compare_precision_profiles(
+            model,
+            tokenizer,
+            sample,
+            batch_size=args.batch_size,
+            max_perturbations=args.max_perturbations,
+            similarity_threshold=args.similarity_threshold,
+            beam_width=args.beam_width
+        )
+        
+        print("\nPrecision Report (bf16 vs fp32):")
+        for name, value in report.items():
+            print(f"{name}: {value:.3f}")
+        summary['precision_report'] = report
+    
     import json
-    with open(output_dir / 'results.json', 'w') as f:
-        json.dump({
-            'args': vars(args),
-            'metrics': metrics,
-            'results': results
-        }, f, indent=2)
+    with open(output_dir / 'summary.json', 'w') as f:
+        json.dump(summary, f, indent=2)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -1,11 +1,17 @@
-import torch
+from __future__ import annotations
+
 import numpy as np
 from typing import List, Dict, Any
-from transformers import AutoModelForMaskedLM, AutoTokenizer
 
 from ..constraints.code_constraints import CodeConstraints
-from ..evaluation.metrics import calculate_codebleu, calculate_bleu
+from ..constraints.syntax_validator import SyntaxValidator
+from ..evaluation.bleu import ReferenceBLEU
+from ..evaluation.metrics import calculate_codebleu
 from ..utils.tokenizer import CodeTokenizer
+from ..models.registry import ModelRegistry, get_registry
+from ..models.query_cache import CachedQueryModel, QueryBudgetExceeded
+from ..constraints.vocab_table import TABLE_CACHE_DIR
+from .substitutes import MLMSubstituteEngine
 
 class CodeAttack:
     def __init__(
@@ -13,71 +19,117 @@ class CodeAttack:
         model: Any,
         max_perturbations: float = 3,
         similarity_threshold: float = 0.8,
-        top_k: int = 50
+        top_k: int = 50,
+        language: str = "python",
+        mlm_name: str = "microsoft/codebert-base-mlm",
+        registry: ModelRegistry = None,
+        query_budget: int = None,
+        query_cache_size: int = 4096,
+        query_batch_size: int = 64,
+        table_cache_dir: str = TABLE_CACHE_DIR
     ):
-        self.model = model
+        # Every query to the target goes through the cache and the per-sample budget
+        if isinstance(model, CachedQueryModel):
+            self.model = model
+        else:
+            self.model = CachedQueryModel(model, max_entries=query_cache_size, query_budget=query_budget)
+        self.query_batch_size = query_batch_size
         self.max_perturbations = max_perturbations
         self.similarity_threshold = similarity_threshold
         self.top_k = top_k
         
-        self.codebert = AutoModelForMaskedLM.from_pretrained("microsoft/codebert-base-mlm")
-        self.tokenizer = AutoTokenizer.from_pretrained("microsoft/codebert-base-mlm")
+        # CodeBERT is only loaded on first use and shared between attack instances
+        self.mlm_name = mlm_name
+        self.registry = registry if registry is not None else get_registry()
         
         self.constraints = CodeConstraints()
+        self.validator = SyntaxValidator(language)
+        self.substitute_engine = MLMSubstituteEngine(
+            mlm_name=mlm_name,
+            registry=self.registry,
+            top_k=top_k,
+            language=language,
+            constraints=self.constraints,
+            table_cache_dir=table_cache_dir
+        )
         
-        self.code_tokenizer = CodeTokenizer()
+        self.code_tokenizer = CodeTokenizer(language)
+        self._bleu = None
         
+    @property
+    def codebert(self):
+        return self.registry.get_model(self.mlm_name)
+    
+    @property
+    def tokenizer(self):
+        return self.registry.get_tokenizer(self.mlm_name)
+    
     def find_vulnerable_tokens(self, code: str) -> List[Dict[str, Any]]:
         tokens = code.split()
-        vulnerable_tokens = []
         
-        for i, token in enumerate(tokens):
+        masked_codes = []
+        for i in range(len(tokens)):
             masked_tokens = tokens.copy()
             masked_tokens[i] = "[MASK]"
-            masked_code = " ".join(masked_tokens)
-            
+            masked_codes.append(" ".join(masked_tokens))
+        
+        try:
             original_output = self.model(code)
-            masked_output = self.model(masked_code)
-            
-            influence_score = self._calculate_influence_score(original_output, masked_output)
-            
-            vulnerable_tokens.append((i, token, influence_score))
+        except QueryBudgetExceeded:
+            return []
+        
+        # Masked variants go to the model in batches; when the budget runs out
+        # only the tokens scored so far are ranked
+        masked_outputs = []
+        for start in range(0, len(masked_codes), self.query_batch_size):
+            chunk = masked_codes[start:start + self.query_batch_size]
+            outputs = self.model.query_batch(chunk)
+            masked_outputs.extend(outputs)
+            if len(outputs) < len(chunk):
+                break
+        
+        if not masked_outputs:
+            return []
+        
+        differences = np.abs(np.stack(masked_outputs) - np.asarray(original_output))
+        influence_scores = differences.reshape(len(masked_outputs), -1).sum(axis=1)
         
+        vulnerable_tokens = [
+            (i, tokens[i], influence_scores[i]) for i in range(len(masked_outputs))
+        ]
         vulnerable_tokens.sort(key=lambda x: x[2], reverse=True)
         return vulnerable_tokens[:self.max_perturbations]
     
-    def _calculate_influence_score(self, original_output: torch.Tensor, masked_output: torch.Tensor) -> float:
-        return np.abs(original_output - masked_output).sum()
-    
-    def generate_substitutes(self, token: str) -> List[str]:
-        substitutes = [
-            token.upper(),
-            token.lower(),
-            token + "1",
-            "var_" + token,
-            token + "_var",
-            token + "x",
-            "new_" + token,
-            token + "_new"
-        ]
-        return substitutes
+    def generate_substitutes(self, code: str, positions: List[int]) -> Dict[int, List[str]]:
+        """Top-k CodeBERT-MLM substitutes for the tokens at ``positions`` of ``code.split()``."""
+        return self.substitute_engine.generate(code, positions)
     
     def generate(self, code: str, target_output: str = None) -> Dict[str, Any]:
+        self.original_code = code
+        self.model.start_sample()
+        
         vulnerable_tokens = self.find_vulnerable_tokens(code)
         
         tokens = code.split()
         variable_map = {}
         
-        for i, original_token, _ in vulnerable_tokens:
-            if original_token in ["def", "return"]:
+        candidates = [
+            (i, original_token) for i, original_token, _ in vulnerable_tokens
+            if original_token not in ["def", "return"]
+            and ((original_token.isidentifier() and not original_token[0].isdigit()) or original_token in ["+", "-", "*", "/"])
+        ]
+        substitutes = self.generate_substitutes(code, [i for i, _ in candidates])
+        
+        for i, original_token in candidates:
+            if original_token in variable_map:
                 continue
-                
-            substitutes = self.generate_substitutes(original_token)
             
-            for substitute in substitutes:
-                if (original_token.isidentifier() and not original_token[0].isdigit()) or original_token in ["+", "-", "*", "/"]:
-                    variable_map[original_token] = substitute
-                    break
+            for substitute in substitutes.get(i, []):
+                # Never rename onto a name that is already in use
+                if substitute in variable_map.values() or (substitute.isidentifier() and substitute in tokens):
+                    continue
+                variable_map[original_token] = substitute
+                break
         
         for i, token in enumerate(tokens):
             if token in variable_map:
@@ -89,7 +141,8 @@ class CodeAttack:
             "original_code": code,
             "adversarial_code": adversarial_code,
             "perturbations": len(variable_map),
-            "similarity": self._calculate_similarity(code, adversarial_code)
+            "similarity": self._calculate_similarity(code, adversarial_code),
+            "queries": self.model.sample_queries
         }
     
     def _check_similarity(self, original: str, adversarial: str) -> bool:
@@ -103,18 +156,21 @@ class CodeAttack:
         union = original_tokens.union(adversarial_tokens)
         return len(intersection) / len(union) if union else 0.0
     
+    def _reference_bleu(self, reference: str) -> ReferenceBLEU:
+        # The reference n-grams are counted once and reused for every candidate output
+        if self._bleu is None or self._bleu[0] != reference:
+            self._bleu = (reference, ReferenceBLEU(reference))
+        return self._bleu[1]
+    
     def _is_attack_successful(self, code: str, target_output: str = None) -> bool:
-        output = self.model(code)
-        
-        if target_output is not None:
-            return calculate_bleu(output, target_output) < self.similarity_threshold
-        else:
-            original_output = self.model(self.original_code)
-            return calculate_bleu(output, original_output) < self.similarity_threshold
+        try:
+            output = self.model(code)
+            
+            if target_output is None:
+                target_output = self.model(self.original_code)
+            return self._reference_bleu(target_output).is_below(output, self.similarity_threshold)
+        except QueryBudgetExceeded:
+            return False
     
     def _is_valid_substitution(self, code: str) -> bool:
-        try:
-            compile(code, "<string>", "exec")
-            return True
-        except:
-            return False 
\ No newline at end of file
+        return self.validator.is_valid(code) 
\ No newline at end of file
@@ -0,0 +1,250 @@
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from ..constraints.code_constraints import CodeConstraints
+from ..constraints.vocab_table import TABLE_CACHE_DIR, VocabConstraintTable
+from ..models.registry import ModelRegistry, get_registry
+from ..utils.lazy import lazy_import
+from ..utils.lru import LRUCache, content_key
+
+torch = lazy_import('torch')
+
+
+class MLMSubstituteEngine:
+    """
+    Substitute generation with a masked language model such as CodeBERT-MLM.
+
+    Every requested position (an index into ``code.split()``) becomes one row
+    of a single batch in which that token is replaced by as many mask tokens
+    as it has subwords, so one forward pass predicts all positions. The
+    per-mask top-k subwords are combined with a small beam search into whole
+    words, which are then filtered through ``CodeConstraints`` and the
+    language keywords. Results are cached per (context hash, position).
+
+    With ``use_vocab_table`` the logits of every mask are first restricted
+    to the vocabulary entries a ``VocabConstraintTable`` allows, so the
+    top-k slots are not spent on subwords the filter would reject.
+
+    Args:
+        mlm_name: Name or local path of the masked language model
+        registry: Registry the model and tokenizer are loaded from
+        top_k: Number of predictions kept per mask and per position
+        language: Language whose keywords are never proposed
+        constraints: Constraints the substitutes must satisfy
+        max_subwords: Tokens split into more subwords than this are skipped
+        max_length: Maximum number of subword tokens per row
+        cache_size: Maximum number of cached (context, position) results
+        use_vocab_table: Mask the logits with the vocabulary constraint table before top-k
+        table_cache_dir: Directory the constraint table is cached in
+    """
+
+    def __init__(
+        self,
+        mlm_name: str = "microsoft/codebert-base-mlm",
+        registry: ModelRegistry = None,
+        top_k: int = 50,
+        language: str = "python",
+        constraints: CodeConstraints = None,
+        max_subwords: int = 3,
+        max_length: int = 512,
+        cache_size: int = 4096,
+        use_vocab_table: bool = True,
+        table_cache_dir: str = TABLE_CACHE_DIR
+    ):
+        self.mlm_name = mlm_name
+        self.registry = registry if registry is not None else get_registry()
+        self.top_k = top_k
+        self.constraints = constraints if constraints is not None else CodeConstraints()
+        self.language = language
+        self.keywords = self.constraints.keywords.get(language, set())
+        self.max_subwords = max_subwords
+        self.max_length = max_length
+        self.cache_size = cache_size
+        self.use_vocab_table = use_vocab_table
+        self.table_cache_dir = table_cache_dir
+        self._table = None
+
+        self._cache = LRUCache(cache_size)
+
+    @property
+    def model(self):
+        return self.registry.get_model(self.mlm_name)
+
+    @property
+    def tokenizer(self):
+        return self.registry.get_tokenizer(self.mlm_name)
+
+    @property
+    def table(self) -> VocabConstraintTable:
+        if self._table is None:
+            self._table = VocabConstraintTable.load_or_build(
+                self.tokenizer, self.constraints, cache_dir=self.table_cache_dir
+            )
+        return self._table
+
+    def generate(self, code: str, positions: List[int]) -> Dict[int, List[str]]:
+        """
+        Propose substitutes for several tokens of one snippet.
+
+        Args:
+            code: Source code; positions index into ``code.split()``
+            positions: Indices of the tokens to replace
+
+        Returns:
+            Mapping from each position to its filtered substitutes, best first
+        """
+        tokens = code.split()
+        context = content_key(code)
+
+        results = {}
+        pending = []
+        for position in positions:
+            cached = self._cache.get((context, position))
+            if cached is not None:
+                results[position] = cached
+            else:
+                pending.append(position)
+
+        if pending:
+            predicted = self._predict(tokens, pending)
+            for position in pending:
+                substitutes = self._filter(tokens[position], predicted.get(position, []))
+                results[position] = substitutes
+
+                self._cache.put((context, position), substitutes)
+
+        return results
+
+    def stats(self) -> Dict[str, float]:
+        return self._cache.stats()
+
+    def clear(self):
+        self._cache.clear()
+
+    def _predict(self, tokens: List[str], positions: List[int]) -> Dict[int, List[str]]:
+        tokenizer = self.tokenizer
+        model = self.model
+
+        rows = []
+        row_positions = []
+        for position in positions:
+            num_subwords = len(tokenizer.tokenize(" " + tokens[position]))
+            if not 0 < num_subwords <= self.max_subwords:
+                continue
+
+            masked = tokens.copy()
+            masked[position] = tokenizer.mask_token * num_subwords
+            rows.append(" ".join(masked))
+            row_positions.append((position, num_subwords))
+
+        if not rows:
+            return {}
+
+        inputs = tokenizer(
+            rows,
+            return_tensors="pt",
+            padding=True,
+            truncation=True,
+            max_length=self.max_length
+        )
+        device = next(model.parameters()).device
+        inputs = {key: value.to(device) for key, value in inputs.items()}
+
+        mask_rows, mask_columns = (inputs["input_ids"] == tokenizer.mask_token_id).nonzero(as_tuple=True)
+
+        with torch.inference_mode():
+            logits = model(**inputs).logits
+
+        # Only the logits at the masks are needed, one row per mask
+        log_probs = torch.log_softmax(logits[mask_rows, mask_columns].float(), dim=-1)
+        mask_rows = mask_rows.tolist()
+
+        if self.use_vocab_table:
+            allowed = self._allowed(tokens, row_positions, mask_rows, log_probs.shape[-1])
+            log_probs = log_probs.masked_fill(~torch.from_numpy(allowed).to(log_probs.device), float("-inf"))
+
+        top_log_probs, top_ids = log_probs.topk(min(self.top_k, log_probs.shape[-1]), dim=-1)
+        top_log_probs = top_log_probs.tolist()
+        top_ids = top_ids.tolist()
+
+        predictions = {}
+        for row, (position, num_subwords) in enumerate(row_positions):
+            masks = [index for index, r in enumerate(mask_rows) if r == row]
+            if len(masks) != num_subwords:
+                # The masks were truncated away
+                continue
+
+            predictions[position] = self._combine(
+                tokenizer,
+                [top_ids[index] for index in masks],
+                [top_log_probs[index] for index in masks]
+            )
+
+        return predictions
+
+    def _allowed(
+        self,
+        tokens: List[str],
+        row_positions: List[Tuple[int, int]],
+        mask_rows: List[int],
+        vocab_size: int
+    ) -> np.ndarray:
+        """Boolean (masks, vocab_size) array of the subwords each mask may be filled with."""
+        table = self.table
+        allowed = np.zeros((len(mask_rows), vocab_size), dtype=bool)
+        size = min(len(table), vocab_size)
+
+        subword = 0
+        for index, row in enumerate(mask_rows):
+            subword = subword + 1 if index > 0 and mask_rows[index - 1] == row else 0
+            position, num_subwords = row_positions[row]
+            original = tokens[position]
+
+            if num_subwords == 1:
+                allowed[index, :size] = table.allowed_mask(original, self.language, word_start=position > 0)[:size]
+            elif not original.isidentifier():
+                # Split operators and literals are only checked as whole words
+                allowed[index] = True
+            elif subword == 0:
+                allowed[index, :size] = table.allowed_mask(original, word_start=position > 0)[:size]
+            else:
+                allowed[index, :size] = table.continuation_mask()[:size]
+
+        return allowed
+
+    def _combine(
+        self,
+        tokenizer,
+        ids: List[List[int]],
+        log_probs: List[List[float]]
+    ) -> List[str]:
+        """Beam search over the per-mask predictions, turning subword sequences into words."""
+        beams: List[Tuple[float, List[int]]] = [(0.0, [])]
+        for step_ids, step_log_probs in zip(ids, log_probs):
+            beams = sorted(
+                ((score + log_prob, beam + [token_id])
+                 for score, beam in beams
+                 for token_id, log_prob in zip(step_ids, step_log_probs)
+                 if log_prob != float("-inf")),
+                key=lambda beam: beam[0],
+                reverse=True
+            )[:self.top_k]
+
+        words = []
+        seen = set()
+        for _, beam in beams:
+            pieces = tokenizer.convert_ids_to_tokens(beam)
+            word = tokenizer.convert_tokens_to_string(pieces).strip()
+            if word and word not in seen:
+                seen.add(word)
+                words.append(word)
+
+        return words
+
+    def _filter(self, original_token: str, candidates: List[str]) -> List[str]:
+        candidates = [
+            candidate for candidate in candidates
+            if candidate not in self.keywords and not any(char.isspace() for char in candidate)
+        ]
+        return self.constraints.filter_substitutes(original_token, candidates)
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, List, Tuple
+
+if TYPE_CHECKING:
+    from transformers import PreTrainedTokenizer
+
+# (start, end, replacement) in character offsets of the original source
+SpanEdit = Tuple[int, int, str]
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == '_'
+
+
+class TokenAlignment:
+    """
+    Maps every subword token of a snippet to its character span in the source.
+
+    Built once per sample from the fast tokenizer's offset mapping, so a
+    candidate is produced by splicing one span into the original string
+    instead of re-materializing the whole token list.
+
+    Args:
+        code: Original source code
+        spans: (start, end) character offsets of each token, without special tokens
+    """
+
+    def __init__(self, code: str, spans: List[Tuple[int, int]]):
+        self.code = code
+        self.spans = spans
+
+    @classmethod
+    def from_code(cls, tokenizer: PreTrainedTokenizer, code: str) -> 'TokenAlignment':
+        if not tokenizer.is_fast:
+            raise ValueError("TokenAlignment requires a fast tokenizer with offset mapping")
+
+        encoding = tokenizer(code, add_special_tokens=False, return_offsets_mapping=True)
+
+        spans = []
+        for start, end in encoding['offset_mapping']:
+            # Byte-level BPE folds the preceding space into the token
+            while start < end and code[start].isspace():
+                start += 1
+            spans.append((start, end))
+
+        return cls(code, spans)
+
+    def __len__(self) -> int:
+        return len(self.spans)
+
+    def text(self, i: int) -> str:
+        start, end = self.spans[i]
+        return self.code[start:end]
+
+    def starts_word(self, i: int) -> bool:
+        """Whether token i is not the continuation of an identifier split into several subwords."""
+        start, end = self.spans[i]
+        if start == 0 or start == end:
+            return True
+        return not (_is_word_char(self.code[start - 1]) and _is_word_char(self.code[start]))
+
+    def substitute(self, i: int, replacement: str) -> SpanEdit:
+        start, end = self.spans[i]
+        return (start, end, replacement)
+
+    def insert(self, i: int, text: str) -> SpanEdit:
+        start, _ = self.spans[i]
+        # Separate the text from both neighbours so it never merges into an existing token
+        before = " " if start > 0 and not self.code[start - 1].isspace() else ""
+        return (start, start, before + text + " ")
+
+    def delete(self, i: int) -> SpanEdit:
+        start, end = self.spans[i]
+        return (start, end, "")
+
+    def swap(self, i: int) -> SpanEdit:
+        start, end = self.spans[i]
+        next_start, next_end = self.spans[i + 1]
+        between = self.code[end:next_start]
+        return (start, next_end, self.code[next_start:next_end] + between + self.code[start:end])
+
+    def splice(self, edits: List[SpanEdit]) -> str:
+        """Apply non-overlapping edits to the original source in a single pass."""
+        pieces = []
+        position = 0
+        for start, end, replacement in sorted(edits, key=lambda edit: (edit[0], edit[1])):
+            pieces.append(self.code[position:start])
+            pieces.append(replacement)
+            position = end
+        pieces.append(self.code[position:])
+        return "".join(pieces)
@@ -1,9 +1,21 @@
-import torch
+from __future__ import annotations
+
+import contextlib
 import numpy as np
-from typing import Dict, Any, List
-from transformers import PreTrainedModel, PreTrainedTokenizer
-from src.utils.metrics import calculate_similarity
-import ast
+from typing import TYPE_CHECKING, Callable, Dict, Any, List, Tuple
+from src.utils.lazy import lazy_import
+from src.utils.metrics import SimilarityEngine
+from src.attacks.importance import ImportanceContext, normalize_scores
+from src.attacks.alignment import SpanEdit, TokenAlignment
+from src.attacks.beam_search import BeamSearch, perturbation_budget
+from src.constraints.syntax_validator import SyntaxValidator
+
+if TYPE_CHECKING:
+    from transformers import PreTrainedModel, PreTrainedTokenizer
+
+torch = lazy_import('torch')
+
+PRECISION_PROFILES = ('fp32', 'bf16')
 
 class CodeAttack:
     def __init__(
@@ -11,12 +23,34 @@ class CodeAttack:
         model: PreTrainedModel,
         tokenizer: PreTrainedTokenizer,
         max_perturbations: float = 0.4,
-        similarity_threshold: float = 0.5
+        similarity_threshold: float = 0.5,
+        candidate_batch_size: int = 32,
+        max_candidates_per_strategy: int = 64,
+        language: str = 'python',
+        beam_width: int = 4,
+        precision: str = 'fp32',
+        screening_model: PreTrainedModel = None,
+        rescore_top_k: int = 4
     ):
         self.model = model
         self.tokenizer = tokenizer
         self.max_perturbations = max_perturbations
         self.similarity_threshold = similarity_threshold
+        self.candidate_batch_size = candidate_batch_size
+        self.max_candidates_per_strategy = max_candidates_per_strategy
+        self.beam_width = beam_width
+        
+        if precision not in PRECISION_PROFILES:
+            raise ValueError(f"Unknown precision profile: {precision}")
+        self.precision = precision
+        
+        # Cheap (e.g. int8) copy of the model that ranks candidates before the
+        # top few are re-verified with the full-precision model
+        self.screening_model = screening_model
+        self.rescore_top_k = rescore_top_k
+        self.screening_rankings = 0
+        self.screening_disagreements = 0
+        self.validator = SyntaxValidator(language)
         
         self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
         self.model = self.model.to(self.device)
@@ -48,18 +82,11 @@ class CodeAttack:
     def find_vulnerable_tokens(self, code: str) -> List[Dict[str, Any]]:
         tokens = self.tokenizer.tokenize(code)
         
-        inputs = self.tokenizer(code, return_tensors='pt')
-        inputs = {k: v.to(self.device) for k, v in inputs.items()}
-        
-        with torch.no_grad():
-            embeddings = self.model.get_input_embeddings()(inputs['input_ids'])
-            output = self.model.generate(**inputs)
-        
-        importance_scores = self._calculate_token_importance(embeddings, output)
+        importance_scores = self.compute_importance([code])[0].token_scores
         
         vulnerable_tokens = []
         for i, token in enumerate(tokens):
-            if importance_scores[i] > 0.5:
+            if i < len(importance_scores) and importance_scores[i] > 0.5:
                 vulnerable_tokens.append({
                     'token': token,
                     'position': i,
@@ -70,6 +97,28 @@ class CodeAttack:
         
         return vulnerable_tokens
     
+    def compute_importance(self, codes: List[str]) -> List[ImportanceContext]:
+        inputs = self.tokenizer(codes, padding=True, truncation=True, return_tensors='pt')
+        inputs = {k: v.to(self.device) for k, v in inputs.items()}
+        
+        original_outputs = self._generate_outputs(inputs)
+        
+        return self._build_importance_contexts(inputs, original_outputs)
+    
+    def _inference_context(self) -> contextlib.ExitStack:
+        stack = contextlib.ExitStack()
+        stack.enter_context(torch.inference_mode())
+        if self.precision == 'bf16':
+            stack.enter_context(torch.autocast(self.device.type, dtype=torch.bfloat16))
+        return stack
+    
+    def _generate_outputs(self, inputs: Dict[str, torch.Tensor]) -> torch.Tensor:
+        with self._inference_context():
+            outputs = self.model.generate(**inputs)
+        
+        # Inference tensors cannot be used by the gradient pass, so hand back a normal copy
+        return outputs.clone()
+    
     def generate_substitutes(self, token: str, context: str) -> List[str]:
         token_type = self._get_token_type(token)
         
@@ -97,37 +146,84 @@ class CodeAttack:
             return 'unknown'
     
     def generate(self, code: str) -> Dict[str, Any]:
-        if not self._is_valid_code(code):
-            return {
-                'original_code': code,
-                'adversarial_code': code,
-                'perturbations': 0,
-                'similarity': 1.0
-            }
-        
-        inputs = self.tokenizer(code, return_tensors='pt')
-        inputs = {k: v.to(self.device) for k, v in inputs.items()}
-        
-        with torch.no_grad():
-            original_output = self.model.generate(**inputs)
-        
-        adversarial_code = self._generate_adversarial(code, inputs, original_output)
-        
-        perturbations = self._count_perturbations(code, adversarial_code)
-        similarity = calculate_similarity(code, adversarial_code)
-        
-        return {
-            'original_code': code,
-            'adversarial_code': adversarial_code,
-            'perturbations': perturbations,
-            'similarity': similarity
-        }
+        return self.generate_batch([code], batch_size=1)[0]
+    
+    def generate_batch(self, codes: List[str], batch_size: int = 8) -> List[Dict[str, Any]]:
+        return self.generate_batch_with_importance(codes, batch_size)[0]
+    
+    def generate_batch_with_importance(
+        self,
+        codes: List[str],
+        batch_size: int = 8
+    ) -> Tuple[List[Dict[str, Any]], List[ImportanceContext]]:
+        """
+        Like generate_batch, but also return the importance context every snippet was attacked with.
+        
+        Snippets skipped as invalid code have no importance context (None).
+        """
+        results = [None] * len(codes)
+        importance = [None] * len(codes)
+        
+        valid_indices = []
+        for i, code in enumerate(codes):
+            if self._is_valid_code(code):
+                valid_indices.append(i)
+            else:
+                results[i] = {
+                    'original_code': code,
+                    'adversarial_code': code,
+                    'perturbations': 0,
+                    'similarity': 1.0
+                }
+        
+        for start in range(0, len(valid_indices), batch_size):
+            batch_indices = valid_indices[start:start + batch_size]
+            batch_codes = [codes[i] for i in batch_indices]
+            
+            inputs = self.tokenizer(batch_codes, padding=True, truncation=True, return_tensors='pt')
+            inputs = {k: v.to(self.device) for k, v in inputs.items()}
+            
+            original_outputs = self._generate_outputs(inputs)
+            
+            contexts = self._build_importance_contexts(inputs, original_outputs)
+            
+            for j, i in enumerate(batch_indices):
+                code = codes[i]
+                importance[i] = contexts[j]
+                rankings, disagreements = self.screening_rankings, self.screening_disagreements
+                
+                # Shared by the beam search and the final result, so the winner is not scored twice
+                similarity = SimilarityEngine(code, threshold=self.similarity_threshold)
+                
+                original_output = self._strip_output_padding(original_outputs[j:j + 1])
+                adversarial_code = self._generate_adversarial(code, original_output, contexts[j], similarity)
+                
+                results[i] = {
+                    'original_code': code,
+                    'adversarial_code': adversarial_code,
+                    'perturbations': self._count_perturbations(code, adversarial_code),
+                    'similarity': similarity.score(adversarial_code, bounded=False)
+                }
+                if self.screening_model is not None:
+                    results[i]['screening'] = {
+                        'rankings': self.screening_rankings - rankings,
+                        'disagreements': self.screening_disagreements - disagreements
+                    }
+        
+        return results, importance
+    
+    def _strip_output_padding(self, output: torch.Tensor) -> torch.Tensor:
+        non_pad = (output[0] != self.tokenizer.pad_token_id).nonzero()
+        if len(non_pad) == 0:
+            return output
+        return output[:, :max(int(non_pad[-1]) + 1, 2)]
     
     def _generate_adversarial(
         self,
         code: str,
-        inputs: Dict[str, torch.Tensor],
-        original_output: torch.Tensor
+        original_output: torch.Tensor,
+        importance: ImportanceContext,
+        similarity: SimilarityEngine = None
     ) -> str:
         methods = [
             self._token_substitution,
@@ -136,182 +232,278 @@ class CodeAttack:
             self._token_reordering
         ]
         
-        best_adversarial = code
-        best_similarity = 1.0
+        alignment = TokenAlignment.from_code(self.tokenizer, code)
         
+        proposals = []
+        seen = set()
         for method in methods:
             try:
-                adversarial = method(code, inputs, original_output)
-                if adversarial == code:
-                    continue
-                    
-                similarity = calculate_similarity(code, adversarial)
-                
-                if similarity >= self.similarity_threshold and similarity < best_similarity:
-                    best_adversarial = adversarial
-                    best_similarity = similarity
+                for edit in method(alignment, importance):
+                    if edit not in seen:
+                        seen.add(edit)
+                        proposals.append(edit)
             except Exception as e:
                 print(f"Error in {method.__name__}: {str(e)}")
                 continue
         
-        return best_adversarial
+        if not proposals:
+            return code
+        
+        if similarity is None:
+            similarity = SimilarityEngine(code, threshold=self.similarity_threshold)
+        
+        decoder_targets = self._decoder_targets(original_output)
+        search = BeamSearch(
+            score_fn=lambda candidates: self._rank_candidates(candidates, decoder_targets),
+            validate_fn=self._is_valid_code,
+            similarity_fn=similarity,
+            beam_width=self.beam_width,
+            budget=perturbation_budget(self.max_perturbations, len(alignment)),
+            similarity_threshold=self.similarity_threshold,
+            cost_fn=self._perturbation_counter(code)
+        )
+        return search.search(alignment, proposals)
     
-    def _token_substitution(
+    def _rank_candidates(
         self,
-        code: str,
-        inputs: Dict[str, torch.Tensor],
-        original_output: torch.Tensor
-    ) -> str:
-        with torch.no_grad():
-            embeddings = self.model.get_input_embeddings()(inputs['input_ids'])
+        candidates: List[str],
+        decoder_targets: Tuple[torch.Tensor, torch.Tensor]
+    ) -> np.ndarray:
+        top_k = max(self.rescore_top_k, self.beam_width)
+        if self.screening_model is None or len(candidates) <= top_k:
+            return self._score_candidates(candidates, decoder_targets)
+        
+        screened = self._score_candidates(candidates, decoder_targets, model=self.screening_model)
+        top = np.argsort(-screened, kind='stable')[:top_k]
+        verified = self._score_candidates([candidates[i] for i in top], decoder_targets)
+        
+        self.screening_rankings += 1
+        if int(np.argmax(verified)) != 0:
+            self.screening_disagreements += 1
+        
+        # Keep the screened order for the rest, shifted below every verified loss
+        rest = np.ones(len(candidates), dtype=bool)
+        rest[top] = False
+        losses = np.empty(len(candidates), dtype=verified.dtype)
+        losses[top] = verified
+        losses[rest] = screened[rest] - screened[rest].max() + verified.min() - 1
+        return losses
+    
+    def screening_stats(self) -> Dict[str, float]:
+        return {
+            'rankings': self.screening_rankings,
+            'disagreements': self.screening_disagreements,
+            'disagreement_rate': (
+                self.screening_disagreements / self.screening_rankings
+                if self.screening_rankings else 0.0
+            )
+        }
+    
+    def _score_candidates(
+        self,
+        candidates: List[str],
+        decoder_targets: Tuple[torch.Tensor, torch.Tensor],
+        model: PreTrainedModel = None
+    ) -> np.ndarray:
+        if model is not None:
+            return self._score_candidates_on_cpu(candidates, decoder_targets, model)
         
-        importance_scores = self._calculate_token_importance(embeddings, original_output)
+        decoder_input_ids, labels = decoder_targets
         
-        tokens = self.tokenizer.tokenize(code)
-        for i in range(len(tokens)):
-            if i < len(importance_scores) and importance_scores[i] > 0.5:
-                for substitute in self._get_token_substitutes(tokens[i]):
-                    new_tokens = tokens.copy()
-                    new_tokens[i] = substitute
-                    new_code = self.tokenizer.convert_tokens_to_string(new_tokens)
-                    
-                    if self._is_valid_code(new_code):
-                        return new_code
-        
-        return code
+        losses = []
+        for start in range(0, len(candidates), self.candidate_batch_size):
+            chunk = candidates[start:start + self.candidate_batch_size]
+            batch = self.tokenizer(chunk, padding=True, truncation=True, return_tensors='pt')
+            batch = {k: v.to(self.device) for k, v in batch.items()}
+            
+            with self._inference_context():
+                output = self.model(
+                    **batch,
+                    decoder_input_ids=decoder_input_ids.expand(len(chunk), -1)
+                )
+            
+            chunk_losses = self._sequence_loss(output.logits, labels.expand(len(chunk), -1))
+            losses.append(chunk_losses.cpu().numpy())
+        
+        return np.concatenate(losses)
     
-    def _token_insertion(
+    def _score_candidates_on_cpu(
         self,
-        code: str,
-        inputs: Dict[str, torch.Tensor],
-        original_output: torch.Tensor
-    ) -> str:
-        with torch.no_grad():
-            embeddings = self.model.get_input_embeddings()(inputs['input_ids'])
+        candidates: List[str],
+        decoder_targets: Tuple[torch.Tensor, torch.Tensor],
+        model: PreTrainedModel
+    ) -> np.ndarray:
+        # Dynamically quantized models only run on the CPU, without autocast
+        decoder_input_ids, labels = (t.cpu() for t in decoder_targets)
         
-        insertion_scores = self._calculate_insertion_scores(embeddings, original_output)
+        losses = []
+        for start in range(0, len(candidates), self.candidate_batch_size):
+            chunk = candidates[start:start + self.candidate_batch_size]
+            batch = self.tokenizer(chunk, padding=True, truncation=True, return_tensors='pt')
+            
+            with torch.inference_mode():
+                output = model(**batch, decoder_input_ids=decoder_input_ids.expand(len(chunk), -1))
+            
+            chunk_losses = self._sequence_loss(output.logits, labels.expand(len(chunk), -1))
+            losses.append(chunk_losses.numpy())
         
-        tokens = self.tokenizer.tokenize(code)
-        for i in range(len(tokens)):
-            if i < len(insertion_scores) and insertion_scores[i] > 0.5:
-                for token_to_insert in self._get_insertion_tokens():
-                    new_tokens = tokens.copy()
-                    new_tokens.insert(i, token_to_insert)
-                    new_code = self.tokenizer.convert_tokens_to_string(new_tokens)
-                    
-                    if self._is_valid_code(new_code):
-                        return new_code
-        
-        return code
+        return np.concatenate(losses)
     
-    def _token_deletion(
+    def _decoder_targets(self, original_output: torch.Tensor):
+        if original_output.size(1) < 2:
+            return original_output, original_output
+        
+        decoder_input_ids = original_output[:, :-1]
+        labels = original_output[:, 1:].masked_fill(
+            original_output[:, 1:] == self.tokenizer.pad_token_id, -100
+        )
+        return decoder_input_ids, labels
+    
+    def _sequence_loss(self, logits: torch.Tensor, labels: torch.Tensor) -> torch.Tensor:
+        token_losses = torch.nn.functional.cross_entropy(
+            logits.transpose(1, 2).float(),
+            labels,
+            ignore_index=-100,
+            reduction='none'
+        )
+        mask = (labels != -100).float()
+        return (token_losses * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)
+    
+    def _ranked_positions(self, scores: np.ndarray, limit: int) -> List[int]:
+        order = np.argsort(-scores[:limit], kind='stable')
+        return [int(i) for i in order if scores[i] > 0.5]
+    
+    def _token_substitution(
         self,
-        code: str,
-        inputs: Dict[str, torch.Tensor],
-        original_output: torch.Tensor
-    ) -> str:
-        with torch.no_grad():
-            embeddings = self.model.get_input_embeddings()(inputs['input_ids'])
-        
-        deletion_scores = self._calculate_deletion_scores(embeddings, original_output)
+        alignment: TokenAlignment,
+        importance: ImportanceContext
+    ) -> List[SpanEdit]:
+        importance_scores = importance.substitution_scores
+        
+        edits = []
+        for i in self._ranked_positions(importance_scores, len(alignment)):
+            for substitute in self._get_token_substitutes(alignment.text(i)):
+                edit = alignment.substitute(i, substitute)
+                
+                if self._is_valid_code(alignment.splice([edit])):
+                    edits.append(edit)
+            if len(edits) >= self.max_candidates_per_strategy:
+                break
         
-        tokens = self.tokenizer.tokenize(code)
-        for i in range(len(tokens)):
-            if i < len(deletion_scores) and deletion_scores[i] > 0.5:
-                new_tokens = tokens.copy()
-                del new_tokens[i]
-                new_code = self.tokenizer.convert_tokens_to_string(new_tokens)
+        return edits[:self.max_candidates_per_strategy]
+    
+    def _token_insertion(
+        self,
+        alignment: TokenAlignment,
+        importance: ImportanceContext
+    ) -> List[SpanEdit]:
+        insertion_scores = importance.insertion_scores
+        
+        edits = []
+        for i in self._ranked_positions(insertion_scores, len(alignment)):
+            # Inserting inside an identifier would rename it
+            if not alignment.starts_word(i):
+                continue
+            for token_to_insert in self._get_insertion_tokens():
+                edit = alignment.insert(i, token_to_insert)
                 
-                if self._is_valid_code(new_code):
-                    return new_code
+                if self._is_valid_code(alignment.splice([edit])):
+                    edits.append(edit)
+            if len(edits) >= self.max_candidates_per_strategy:
+                break
         
-        return code
+        return edits[:self.max_candidates_per_strategy]
+    
+    def _token_deletion(
+        self,
+        alignment: TokenAlignment,
+        importance: ImportanceContext
+    ) -> List[SpanEdit]:
+        deletion_scores = importance.deletion_scores
+        
+        edits = []
+        for i in self._ranked_positions(deletion_scores, len(alignment)):
+            edit = alignment.delete(i)
+            
+            if self._is_valid_code(alignment.splice([edit])):
+                edits.append(edit)
+            if len(edits) >= self.max_candidates_per_strategy:
+                break
+        
+        return edits
     
     def _token_reordering(
         self,
-        code: str,
+        alignment: TokenAlignment,
+        importance: ImportanceContext
+    ) -> List[SpanEdit]:
+        reordering_scores = importance.reordering_scores
+        
+        edits = []
+        for i in self._ranked_positions(reordering_scores, len(alignment) - 1):
+            edit = alignment.swap(i)
+            
+            if self._is_valid_code(alignment.splice([edit])):
+                edits.append(edit)
+            if len(edits) >= self.max_candidates_per_strategy:
+                break
+        
+        return edits
+    
+    def _build_importance_contexts(
+        self,
         inputs: Dict[str, torch.Tensor],
-        original_output: torch.Tensor
-    ) -> str:
+        original_outputs: torch.Tensor
+    ) -> List[ImportanceContext]:
         with torch.no_grad():
             embeddings = self.model.get_input_embeddings()(inputs['input_ids'])
         
-        reordering_scores = self._calculate_reordering_scores(embeddings, original_output)
+        saliency = self._calculate_token_importance(embeddings, inputs, original_outputs)
         
-        tokens = self.tokenizer.tokenize(code)
-        for i in range(len(tokens) - 1):
-            if i < len(reordering_scores) and reordering_scores[i] > 0.5:
-                new_tokens = tokens.copy()
-                new_tokens[i], new_tokens[i + 1] = new_tokens[i + 1], new_tokens[i]
-                new_code = self.tokenizer.convert_tokens_to_string(new_tokens)
-                
-                if self._is_valid_code(new_code):
-                    return new_code
+        attention_mask = inputs.get('attention_mask', torch.ones_like(inputs['input_ids']))
+        
+        contexts = []
+        for input_ids, mask, scores in zip(inputs['input_ids'].tolist(), attention_mask.tolist(), saliency):
+            special_tokens_mask = self.tokenizer.get_special_tokens_mask(
+                input_ids,
+                already_has_special_tokens=True
+            )
+            keep = (np.array(mask) == 1) & (np.array(special_tokens_mask) == 0)
+            contexts.append(ImportanceContext(normalize_scores(scores[keep[:len(scores)]])))
         
-        return code
+        return contexts
     
     def _calculate_token_importance(
         self,
         embeddings: torch.Tensor,
-        original_output: torch.Tensor
+        inputs: Dict[str, torch.Tensor],
+        original_outputs: torch.Tensor
     ) -> np.ndarray:
-        embeddings.requires_grad = True
-        output = self.model(inputs_embeds=embeddings, decoder_input_ids=original_output)
-        
-        if output.loss is None:
-            logits = output.logits
-            labels = original_output
-            loss_fn = torch.nn.CrossEntropyLoss()
-            loss = loss_fn(logits.view(-1, logits.size(-1)), labels.view(-1))
-        else:
-            loss = output.loss
+        embeddings = embeddings.detach().requires_grad_(True)
+        decoder_input_ids, labels = self._decoder_targets(original_outputs)
+        
+        # The gradient pass always runs in full precision, whatever the profile
+        with torch.autocast(self.device.type, enabled=False):
+            output = self.model(
+                inputs_embeds=embeddings,
+                attention_mask=inputs.get('attention_mask'),
+                decoder_input_ids=decoder_input_ids
+            )
+        
+        # Samples are independent, so the gradient of the summed loss gives
+        # every sample its own saliency in a single backward pass.
+        loss = self._sequence_loss(output.logits, labels).sum()
             
         if not loss.requires_grad:
             loss = loss.clone().detach().requires_grad_(True)
-            
-        loss.backward()
-        
-        if embeddings.grad is None:
-            return np.zeros(embeddings.size(0))
-            
-        importance_scores = torch.abs(embeddings.grad).mean(dim=-1)
-        importance_scores = importance_scores.cpu().numpy()
-        
-        if importance_scores.size > 0:
-            importance_scores = (importance_scores - importance_scores.min()) / (importance_scores.max() - importance_scores.min() + 1e-8)
-        
-        return importance_scores
-    
-    def _calculate_insertion_scores(
-        self,
-        embeddings: torch.Tensor,
-        original_output: torch.Tensor
-    ) -> np.ndarray:
-        importance_scores = self._calculate_token_importance(embeddings, original_output)
-        insertion_scores = np.zeros(len(importance_scores) + 1)
-        insertion_scores[1:-1] = (importance_scores[:-1] + importance_scores[1:]) / 2
-        insertion_scores[0] = importance_scores[0]
-        insertion_scores[-1] = importance_scores[-1]
         
-        return insertion_scores
-    
-    def _calculate_deletion_scores(
-        self,
-        embeddings: torch.Tensor,
-        original_output: torch.Tensor
-    ) -> np.ndarray:
-        return self._calculate_token_importance(embeddings, original_output)
-    
-    def _calculate_reordering_scores(
-        self,
-        embeddings: torch.Tensor,
-        original_output: torch.Tensor
-    ) -> np.ndarray:
-        importance_scores = self._calculate_token_importance(embeddings, original_output)
-        reordering_scores = np.zeros(len(importance_scores) - 1)
-        reordering_scores = (importance_scores[:-1] + importance_scores[1:]) / 2
+        # Only the input embeddings need a gradient; skip accumulating into the weights.
+        grad, = torch.autograd.grad(loss, embeddings, allow_unused=True)
         
-        return reordering_scores
+        if grad is None:
+            return np.zeros(embeddings.shape[:2])
+            
+        return torch.abs(grad).mean(dim=-1).cpu().numpy()
     
     def _get_token_substitutes(self, token: str) -> List[str]:
         return self.token_substitutes.get(token, [])
@@ -320,15 +512,13 @@ class CodeAttack:
         return self.insertion_tokens
     
     def _is_valid_code(self, code: str) -> bool:
-        try:
-            ast.parse(code)
-            return True
-        except SyntaxError:
-            return False
+        return self.validator.is_valid(code)
     
     def _count_perturbations(self, original_code: str, adversarial_code: str) -> int:
-        original_tokens = self.tokenizer.tokenize(original_code)
-        adversarial_tokens = self.tokenizer.tokenize(adversarial_code)
-        
+        return self._perturbation_counter(original_code)(adversarial_code)
+    
+    def _perturbation_counter(self, original_code: str) -> Callable[[str], int]:
+        # Token-level edit distance to the original, which is tokenized once
         from Levenshtein import distance
-        return distance(original_tokens, adversarial_tokens) 
\ No newline at end of file
+        original_tokens = self.tokenizer.tokenize(original_code)
+        return lambda code: distance(original_tokens, self.tokenizer.tokenize(code)) 
\ No newline at end of file
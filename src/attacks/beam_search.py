@@ -0,0 +1,117 @@
+from typing import Callable, List, Tuple
+
+import numpy as np
+
+from src.attacks.alignment import SpanEdit, TokenAlignment
+
+
+def perturbation_budget(max_perturbations: float, num_tokens: int) -> int:
+    """Turn ``max_perturbations`` (a fraction of the tokens if < 1, else a count) into a token count."""
+    if max_perturbations < 1:
+        return max(1, int(max_perturbations * num_tokens))
+    return int(max_perturbations)
+
+
+def _conflicts(edit: SpanEdit, other: SpanEdit) -> bool:
+    start, end, _ = edit
+    other_start, other_end, _ = other
+    return start == other_start or (start < other_end and other_start < end)
+
+
+class BeamSearch:
+    """
+    Beam search over combinations of span edits, up to a perturbation budget.
+
+    The budget is counted in tokens: one edit can change several tokens (an
+    inserted statement, a swap), so every candidate is charged its real cost
+    with ``cost_fn`` and dropped when it exceeds the budget. Without
+    ``cost_fn`` every edit costs one token.
+
+    Every step extends each beam with one more non-overlapping edit, drops
+    candidates that fail validation, exceed the budget or fall below the similarity threshold,
+    scores all survivors in one batched call and keeps the ``beam_width``
+    most damaging ones. After the first step only the ``pool_size`` best
+    single edits are used for expansion, which keeps each step at roughly
+    ``beam_width * pool_size`` candidates instead of growing exponentially.
+
+    Args:
+        score_fn: Maps a list of candidate codes to their losses (higher is more adversarial)
+        validate_fn: Returns whether a candidate is syntactically valid
+        similarity_fn: Similarity of a candidate to the original code
+        beam_width: Number of beams kept after each step
+        budget: Maximum number of perturbed tokens in one candidate
+        similarity_threshold: Candidates below this similarity are pruned
+        pool_size: Number of single edits used to extend beams after the first step
+        cost_fn: Number of tokens a candidate code perturbs relative to the original
+    """
+
+    def __init__(
+        self,
+        score_fn: Callable[[List[str]], np.ndarray],
+        validate_fn: Callable[[str], bool],
+        similarity_fn: Callable[[str], float],
+        beam_width: int = 4,
+        budget: int = 1,
+        similarity_threshold: float = 0.5,
+        pool_size: int = 32,
+        cost_fn: Callable[[str], int] = None
+    ):
+        self.score_fn = score_fn
+        self.validate_fn = validate_fn
+        self.similarity_fn = similarity_fn
+        self.beam_width = beam_width
+        self.budget = budget
+        self.similarity_threshold = similarity_threshold
+        self.pool_size = pool_size
+        self.cost_fn = cost_fn
+
+    def search(self, alignment: TokenAlignment, proposals: List[SpanEdit]) -> str:
+        # A beam is a sorted tuple of indices into ``proposals``
+        beams: List[Tuple[int, ...]] = [()]
+        pool = list(range(len(proposals)))
+        seen = {()}
+
+        best_code = alignment.code
+        best_loss = -np.inf
+
+        for step in range(self.budget):
+            expansions = []
+            codes = []
+            for beam in beams:
+                for index in pool:
+                    if any(_conflicts(proposals[index], proposals[i]) for i in beam):
+                        continue
+
+                    candidate = tuple(sorted(beam + (index,)))
+                    if candidate in seen:
+                        continue
+                    seen.add(candidate)
+
+                    code = alignment.splice([proposals[i] for i in candidate])
+                    if code == alignment.code or not self.validate_fn(code):
+                        continue
+                    if self.cost_fn is not None and self.cost_fn(code) > self.budget:
+                        continue
+                    if self.similarity_fn(code) < self.similarity_threshold:
+                        continue
+
+                    expansions.append(candidate)
+                    codes.append(code)
+
+            if not expansions:
+                break
+
+            losses = self.score_fn(codes)
+            order = np.argsort(-losses, kind='stable')
+
+            if step == 0:
+                pool = [expansions[i][0] for i in order[:self.pool_size]]
+
+            if losses[order[0]] <= best_loss:
+                break
+
+            best_loss = losses[order[0]]
+            best_code = codes[order[0]]
+            beams = [expansions[i] for i in order[:self.beam_width]]
+
+        return best_code
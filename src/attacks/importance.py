@@ -0,0 +1,54 @@
+import numpy as np
+
+
+def normalize_scores(scores: np.ndarray) -> np.ndarray:
+    if scores.size == 0:
+        return scores
+    return (scores - scores.min()) / (scores.max() - scores.min() + 1e-8)
+
+
+class ImportanceContext:
+    """
+    Token importance of a single sample, shared by all perturbation strategies.
+
+    The gradient pass runs once when the context is built; insertion and
+    reordering scores are derived from the same vector on first access.
+
+    Args:
+        token_scores: Normalized importance of each (non-special) input token
+    """
+
+    def __init__(self, token_scores: np.ndarray):
+        self.token_scores = token_scores
+        self._insertion_scores = None
+        self._reordering_scores = None
+
+    def __len__(self) -> int:
+        return len(self.token_scores)
+
+    @property
+    def substitution_scores(self) -> np.ndarray:
+        return self.token_scores
+
+    @property
+    def deletion_scores(self) -> np.ndarray:
+        return self.token_scores
+
+    @property
+    def insertion_scores(self) -> np.ndarray:
+        if self._insertion_scores is None:
+            scores = self.token_scores
+            insertion_scores = np.zeros(len(scores) + 1)
+            if len(scores) > 0:
+                insertion_scores[1:-1] = (scores[:-1] + scores[1:]) / 2
+                insertion_scores[0] = scores[0]
+                insertion_scores[-1] = scores[-1]
+            self._insertion_scores = insertion_scores
+        return self._insertion_scores
+
+    @property
+    def reordering_scores(self) -> np.ndarray:
+        if self._reordering_scores is None:
+            scores = self.token_scores
+            self._reordering_scores = (scores[:-1] + scores[1:]) / 2
+        return self._reordering_scores
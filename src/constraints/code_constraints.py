@@ -1,26 +1,12 @@
 from typing import List, Set
 import re
-from ..utils.tokenizer import CodeTokenizer
+from ..utils.tokenizer import CodeTokenizer, KEYWORDS
 
 class CodeConstraints:
     def __init__(self):
         self.tokenizer = CodeTokenizer()
         
-        self.keywords = {
-            "java": {"public", "private", "protected", "static", "final", "class", "interface", 
-                    "extends", "implements", "void", "int", "float", "double", "boolean", 
-                    "char", "byte", "short", "long", "if", "else", "for", "while", "do", 
-                    "switch", "case", "break", "continue", "return", "try", "catch", "finally", 
-                    "throw", "throws", "new", "this", "super", "import", "package"},
-            "python": {"def", "class", "if", "elif", "else", "for", "while", "try", "except", 
-                      "finally", "with", "import", "from", "as", "pass", "break", "continue", 
-                      "return", "yield", "raise", "global", "nonlocal", "True", "False", "None"},
-            "csharp": {"public", "private", "protected", "internal", "static", "readonly", 
-                      "class", "interface", "struct", "enum", "void", "int", "float", "double", 
-                      "bool", "char", "byte", "short", "long", "if", "else", "for", "while", 
-                      "do", "switch", "case", "break", "continue", "return", "try", "catch", 
-                      "finally", "throw", "using", "namespace", "new", "this", "base"}
-        }
+        self.keywords = KEYWORDS
         
         self.operator_constraints = {
             '+': ['-', '*', '/'],
@@ -0,0 +1,217 @@
+import ast
+import textwrap
+from typing import Dict
+
+from ..utils.lru import LRUCache, content_key
+
+OPENING_BRACKETS = {')': '(', ']': '[', '}': '{'}
+
+# Lexical rules of each supported language: line comment marker, block
+# comment delimiters and whether triple-quoted strings exist.
+LEXICAL_SYNTAX = {
+    "python": {"line_comment": "#", "block_comment": None, "triple_quotes": True},
+    "java": {"line_comment": "//", "block_comment": ("/*", "*/"), "triple_quotes": True},
+    "csharp": {"line_comment": "//", "block_comment": ("/*", "*/"), "triple_quotes": False},
+}
+
+
+class SyntaxValidator:
+    """
+    Cached syntax validation for candidate code.
+
+    Every candidate first goes through a bounded LRU cache keyed by a hash of
+    its content, then through a linear lexical prefilter (brackets, quotes,
+    comments and, for Python, indentation) and only then through the
+    language backend. Python is checked with ``ast.parse``; Java and C# have
+    no parser in our dependencies, so their backend is the lexical check.
+
+    Args:
+        language: One of ``python``, ``java`` or ``csharp``
+        cache_size: Maximum number of validation results kept
+    """
+
+    def __init__(self, language: str = "python", cache_size: int = 8192):
+        if language not in LEXICAL_SYNTAX:
+            raise ValueError(f"Unsupported language: {language}")
+
+        self.language = language
+        self.cache_size = cache_size
+        self.syntax = LEXICAL_SYNTAX[language]
+        self.backends = {
+            "python": self._parse_python,
+            "java": self._lexical_check,
+            "csharp": self._lexical_check,
+        }
+
+        self._cache = LRUCache(cache_size)
+        self.prefilter_rejects = 0
+        self.parse_rejects = 0
+
+    def is_valid(self, code: str) -> bool:
+        key = content_key(code)
+
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        valid = self._validate(code)
+        self._cache.put(key, valid)
+        return valid
+
+    __call__ = is_valid
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            **self._cache.stats(),
+            "prefilter_rejects": self.prefilter_rejects,
+            "parse_rejects": self.parse_rejects,
+        }
+
+    def clear(self):
+        self._cache.clear()
+
+    def _validate(self, code: str) -> bool:
+        if self.language == "python":
+            # Snippets are often cut out of a larger file with their indentation
+            code = textwrap.dedent(code)
+
+        if not self._lexical_check(code):
+            self.prefilter_rejects += 1
+            return False
+
+        if self.backends[self.language] is self._lexical_check:
+            return True
+
+        if not self.backends[self.language](code):
+            self.parse_rejects += 1
+            return False
+
+        return True
+
+    def _parse_python(self, code: str) -> bool:
+        try:
+            ast.parse(code)
+            return True
+        except (SyntaxError, ValueError):
+            return False
+
+    def _lexical_check(self, code: str) -> bool:
+        """
+        Single linear scan that rejects code which cannot possibly parse.
+
+        Only definite errors are rejected: a mismatched or unclosed bracket,
+        an unterminated string or block comment and, for Python, a dedent to
+        an unknown level or an indent that does not follow a ``:``.
+        """
+        line_comment = self.syntax["line_comment"]
+        block_comment = self.syntax["block_comment"]
+        triple_quotes = self.syntax["triple_quotes"]
+        check_indentation = self.language == "python"
+
+        stack = []
+        indents = [0]
+        at_line_start = True
+        opens_block = False
+
+        i = 0
+        n = len(code)
+        while i < n:
+            char = code[i]
+
+            if at_line_start:
+                at_line_start = False
+                if check_indentation and not stack:
+                    end = i
+                    while end < n and code[end] in " \t":
+                        end += 1
+                    if end < n and code[end] not in "\r\n" and code[end] != "#":
+                        indent = len(code[i:end].expandtabs(8))
+                        if indent > indents[-1]:
+                            if not opens_block:
+                                return False
+                            indents.append(indent)
+                        elif indent < indents[-1]:
+                            while indents[-1] > indent:
+                                indents.pop()
+                            if indents[-1] != indent:
+                                return False
+                        opens_block = False
+                    i = end
+                    continue
+
+            if char == "\n":
+                at_line_start = True
+                i += 1
+                continue
+
+            if char == "\\":
+                # Escaped character or explicit line continuation
+                i += 2
+                continue
+
+            if code.startswith(line_comment, i):
+                while i < n and code[i] != "\n":
+                    i += 1
+                continue
+
+            if block_comment and code.startswith(block_comment[0], i):
+                end = code.find(block_comment[1], i + len(block_comment[0]))
+                if end == -1:
+                    return False
+                i = end + len(block_comment[1])
+                continue
+
+            if char in "\"'":
+                i = self._skip_string(code, i, triple_quotes)
+                if i < 0:
+                    return False
+                opens_block = False
+                continue
+
+            if char in "([{":
+                stack.append(char)
+            elif char in ")]}":
+                if not stack or stack.pop() != OPENING_BRACKETS[char]:
+                    return False
+
+            if not char.isspace():
+                opens_block = char == ":" and not stack
+            i += 1
+
+        return not stack
+
+    def _skip_string(self, code: str, start: int, triple_quotes: bool) -> int:
+        """Return the index just past the string literal at ``start``, or -1 if unterminated."""
+        quote = code[start]
+        verbatim = self.language == "csharp" and start > 0 and code[start - 1] == "@"
+
+        if triple_quotes and code.startswith(quote * 3, start):
+            delimiter = quote * 3
+            i = start + 3
+            while i < len(code):
+                if code[i] == "\\":
+                    i += 2
+                    continue
+                if code.startswith(delimiter, i):
+                    return i + 3
+                i += 1
+            return -1
+
+        i = start + 1
+        while i < len(code):
+            char = code[i]
+            if verbatim:
+                if char == quote:
+                    if code.startswith(quote * 2, i):
+                        i += 2
+                        continue
+                    return i + 1
+            elif char == "\\":
+                i += 2
+                continue
+            elif char == quote:
+                return i + 1
+            elif char == "\n":
+                return -1
+            i += 1
+        return -1
@@ -0,0 +1,198 @@
+import hashlib
+import json
+import os
+import re
+from typing import Dict
+
+import numpy as np
+
+from .code_constraints import CodeConstraints
+from ..utils.tokenizer import KEYWORDS
+
+TOKEN_CLASSES = ('operator', 'bracket', 'number', 'identifier', 'unknown')
+
+# Per-user cache, so that tables are shared between checkouts and never land in the working directory
+TABLE_CACHE_DIR = os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'),
+    'codeattack', 'constraint_tables'
+)
+
+_CONTINUATION = re.compile(r'[A-Za-z0-9_]+')
+
+
+def _cache_path(tokenizer, cache_dir: str) -> str:
+    name = re.sub(r'[^A-Za-z0-9_.-]+', '_', str(getattr(tokenizer, 'name_or_path', '') or 'tokenizer'))
+    vocab = json.dumps(sorted(tokenizer.get_vocab().items()), ensure_ascii=False)
+    digest = hashlib.blake2b(vocab.encode('utf-8'), digest_size=8).hexdigest()
+    return os.path.join(cache_dir, f'{name.strip("_")}-{digest}.npz')
+
+
+class VocabConstraintTable:
+    """
+    ``CodeConstraints`` precomputed over a whole subword vocabulary.
+
+    Every vocabulary entry gets the class of its text, whether it starts a
+    new word, whether it can continue an identifier and whether it is a
+    special token, plus one allowed-substitution row per operator and per
+    bracket and one keyword row per language. ``allowed_mask`` combines
+    these into a boolean mask over the vocabulary that is applied to MLM
+    logits before top-k; masks are memoized per original token.
+
+    Args:
+        arrays: Table arrays as produced by ``build`` or read from disk
+        constraints: Constraints the table was built from
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray], constraints: CodeConstraints = None):
+        self.constraints = constraints if constraints is not None else CodeConstraints()
+        self.arrays = arrays
+        self.class_ids = arrays['class_ids']
+        self.word_start = arrays['word_start']
+        self.continuation = arrays['continuation']
+        self.special = arrays['special']
+        self.operator_keys = [str(key) for key in arrays['operator_keys']]
+        self.operator_masks = arrays['operator_masks']
+        self.bracket_keys = [str(key) for key in arrays['bracket_keys']]
+        self.bracket_masks = arrays['bracket_masks']
+        self.keyword_masks = {
+            language: arrays[f'keyword_{language}'] for language in KEYWORDS
+        }
+        self._masks = {}
+
+    def __len__(self) -> int:
+        return len(self.class_ids)
+
+    @classmethod
+    def build(cls, tokenizer, constraints: CodeConstraints = None) -> 'VocabConstraintTable':
+        constraints = constraints if constraints is not None else CodeConstraints()
+        size = len(tokenizer)
+        tokens = tokenizer.convert_ids_to_tokens(list(range(size)))
+        special_ids = set(tokenizer.all_special_ids)
+
+        # Decoding each token after a fixed one shows whether it starts a new word
+        anchor = tokenizer.tokenize('x')[0]
+        anchor_text = tokenizer.convert_tokens_to_string([anchor])
+
+        class_ids = np.full(size, TOKEN_CLASSES.index('unknown'), dtype=np.int8)
+        word_start = np.zeros(size, dtype=bool)
+        continuation = np.zeros(size, dtype=bool)
+        special = np.zeros(size, dtype=bool)
+        texts = [''] * size
+
+        for token_id, token in enumerate(tokens):
+            if token is None or token_id in special_ids:
+                special[token_id] = True
+                continue
+
+            decoded = tokenizer.convert_tokens_to_string([anchor, token])
+            if not decoded.startswith(anchor_text):
+                special[token_id] = True
+                continue
+
+            rest = decoded[len(anchor_text):]
+            text = rest.strip()
+            texts[token_id] = text
+            word_start[token_id] = rest[:1].isspace()
+            continuation[token_id] = not word_start[token_id] and bool(_CONTINUATION.fullmatch(rest))
+            if text:
+                class_ids[token_id] = TOKEN_CLASSES.index(constraints._get_token_class(text))
+
+        text_ids = {}
+        for token_id, text in enumerate(texts):
+            if text and not special[token_id]:
+                text_ids.setdefault(text, []).append(token_id)
+
+        def rows(allowed: Dict[str, list]) -> np.ndarray:
+            masks = np.zeros((len(allowed), size), dtype=bool)
+            for row, substitutes in enumerate(allowed.values()):
+                for substitute in substitutes:
+                    masks[row, text_ids.get(substitute, [])] = True
+            return masks
+
+        arrays = {
+            'class_ids': class_ids,
+            'word_start': word_start,
+            'continuation': continuation,
+            'special': special,
+            'operator_keys': np.array(list(constraints.operator_constraints)),
+            'operator_masks': rows(constraints.operator_constraints),
+            'bracket_keys': np.array(list(constraints.bracket_constraints)),
+            'bracket_masks': rows(constraints.bracket_constraints),
+        }
+        for language, keywords in KEYWORDS.items():
+            arrays[f'keyword_{language}'] = rows({'keywords': sorted(keywords)})[0]
+
+        return cls(arrays, constraints)
+
+    @classmethod
+    def load_or_build(
+        cls,
+        tokenizer,
+        constraints: CodeConstraints = None,
+        cache_dir: str = TABLE_CACHE_DIR
+    ) -> 'VocabConstraintTable':
+        """Load the table of ``tokenizer`` from ``cache_dir``, building and saving it on first use."""
+        path = _cache_path(tokenizer, cache_dir)
+        if os.path.exists(path):
+            with np.load(path) as data:
+                table = cls(dict(data), constraints)
+            if (table.operator_keys == list(table.constraints.operator_constraints)
+                    and table.bracket_keys == list(table.constraints.bracket_constraints)):
+                return table
+
+        table = cls.build(tokenizer, constraints)
+        table.save(path)
+        return table
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+        # Write next to the final file and rename, so that concurrent workers never read a partial table
+        temporary = f'{path}.{os.getpid()}.tmp.npz'
+        np.savez_compressed(temporary, **self.arrays)
+        os.replace(temporary, path)
+
+    def allowed_mask(self, original_token: str, language: str = None, word_start: bool = True) -> np.ndarray:
+        """
+        Vocabulary entries that may replace ``original_token`` as a single subword.
+
+        Args:
+            original_token: Token being replaced
+            language: Keywords of this language are excluded, if given
+            word_start: Whether the entry has to start a new word
+
+        Returns:
+            Read-only boolean mask over the vocabulary
+        """
+        key = (original_token, language, word_start)
+        mask = self._masks.get(key)
+        if mask is not None:
+            return mask
+
+        token_class = self.constraints._get_token_class(original_token)
+        mask = (self.class_ids == TOKEN_CLASSES.index(token_class)) & ~self.special
+        mask &= self.word_start == word_start
+
+        if token_class == 'operator':
+            mask &= self.operator_masks[self.operator_keys.index(original_token)]
+        elif token_class == 'bracket':
+            mask &= self.bracket_masks[self.bracket_keys.index(original_token)]
+
+        if language is not None:
+            mask &= ~self.keyword_masks[language]
+
+        mask.flags.writeable = False
+        self._masks[key] = mask
+        return mask
+
+    def continuation_mask(self) -> np.ndarray:
+        """Vocabulary entries that can continue an identifier started by a previous subword."""
+        mask = self._masks.get('continuation')
+        if mask is None:
+            mask = self.continuation & ~self.special
+            mask.flags.writeable = False
+            self._masks['continuation'] = mask
+        return mask
+
+    def token_class(self, token_id: int) -> str:
+        return TOKEN_CLASSES[self.class_ids[token_id]]
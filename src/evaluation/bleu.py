@@ -0,0 +1,180 @@
+import math
+import sys
+from typing import Callable, Dict, List, Sequence, Tuple, Union
+
+import numpy as np
+
+Tokens = Union[str, Sequence[str]]
+
+
+def _tokens(text: Tokens) -> List[str]:
+    return text.split() if isinstance(text, str) else list(text)
+
+
+class ReferenceBLEU:
+    """
+    Sentence BLEU of many candidates against one fixed reference.
+
+    Scores are identical to ``nltk.translate.bleu_score.sentence_bleu([reference], candidate, ...)``,
+    including smoothing and automatic re-weighting. The reference n-grams are
+    counted once: every order is stored as sorted integer keys with their
+    counts, where the key of an n-gram is built from the index of its
+    (n-1)-gram prefix and the id of its last token. Candidates are mapped onto
+    the same keys with array operations, so the clipped counts of a whole batch
+    come from a few ``searchsorted``/``unique`` calls.
+
+    With a threshold and no smoothing (or ``method0``), scoring stops for a
+    candidate as soon as the orders computed so far put its score below the
+    threshold; such a candidate gets an upper bound strictly below the
+    threshold instead of its exact score. Strings are split on whitespace,
+    like ``calculate_bleu``.
+
+    Args:
+        reference: Reference text or tokens
+        weights: Weights of the n-gram orders
+        smoothing_function: NLTK smoothing function, or None
+        auto_reweigh: Re-weight uniformly for candidates shorter than four tokens, as in NLTK
+    """
+
+    def __init__(
+        self,
+        reference: Tokens,
+        weights: Tuple[float, ...] = (0.25, 0.25, 0.25, 0.25),
+        smoothing_function: Callable = None,
+        auto_reweigh: bool = False
+    ):
+        from nltk.translate.bleu_score import SmoothingFunction
+
+        self.reference = _tokens(reference)
+        self.weights = tuple(weights)
+        self.max_n = len(self.weights)
+        self.smoothing_function = smoothing_function or SmoothingFunction().method0
+        self.auto_reweigh = auto_reweigh
+
+        # Bounds only hold while every precision stays at most 1
+        smoothing = getattr(self.smoothing_function, '__func__', self.smoothing_function)
+        self.boundable = (
+            smoothing is SmoothingFunction.method0
+            and all(w >= 0 for w in self.weights)
+            and not auto_reweigh
+        )
+        self.early_exits = 0
+
+        self._vocab: Dict[str, int] = {}
+        ids = np.array([self._vocab.setdefault(token, len(self._vocab)) for token in self.reference], dtype=np.int64)
+        self._base = max(len(self._vocab), 1)
+
+        # keys[n - 1] are the sorted distinct n-gram keys of the reference, counts[n - 1] their counts
+        self._keys: List[np.ndarray] = []
+        self._counts: List[np.ndarray] = []
+        prefix = np.full(len(ids), -1, dtype=np.int64)
+        for n in range(1, self.max_n + 1):
+            size = max(len(ids) - n + 1, 0)
+            keys = ids[:size] if n == 1 else prefix[:size] * self._base + ids[n - 1:n - 1 + size]
+            unique, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+            self._keys.append(unique)
+            self._counts.append(counts)
+            prefix = inverse.reshape(-1)
+
+    def score(self, candidate: Tokens, threshold: float = None) -> float:
+        return float(self.score_batch([candidate], threshold)[0])
+
+    __call__ = score
+
+    def is_below(self, candidate: Tokens, threshold: float) -> bool:
+        """Whether the BLEU of candidate is below threshold, stopping as early as possible."""
+        return bool(self.score_batch([candidate], threshold)[0] < threshold)
+
+    def score_batch(self, candidates: List[Tokens], threshold: float = None) -> np.ndarray:
+        """
+        BLEU of every candidate.
+
+        Args:
+            candidates: Candidate texts or token lists
+            threshold: Candidates that cannot reach it may get an upper bound below it instead of their exact score
+
+        Returns:
+            Array with one score per candidate
+        """
+        candidates = [_tokens(candidate) for candidate in candidates]
+        lengths = np.array([len(candidate) for candidate in candidates], dtype=np.int64)
+        bounded = threshold is not None and self.boundable
+
+        # All candidates in one flat array; the -1 after each one keeps n-grams from crossing candidates
+        flat = np.full(int(lengths.sum()) + len(candidates) + self.max_n, -1, dtype=np.int64)
+        starts = np.concatenate([[0], np.cumsum(lengths + 1)[:-1]]).astype(np.int64)
+        sample = np.full(len(flat), -1, dtype=np.int64)
+        for index, (candidate, start) in enumerate(zip(candidates, starts)):
+            flat[start:start + len(candidate)] = [self._vocab.get(token, -1) for token in candidate]
+            sample[start:start + len(candidate)] = index
+
+        numerators = np.zeros((len(candidates), self.max_n), dtype=np.int64)
+        denominators = np.maximum(1, lengths[:, None] - np.arange(self.max_n)[None, :])
+        bp = np.array([self._brevity_penalty(length) for length in lengths], dtype=float)
+        log_bound = np.zeros(len(candidates))
+        active = np.ones(len(candidates), dtype=bool)
+
+        # Positions where the n-gram of the current order starts, with the index of that n-gram in the reference keys
+        positions = np.flatnonzero(flat >= 0)
+        prefix = flat[positions]
+        for n in range(1, self.max_n + 1):
+            if n > 1:
+                tokens = flat[positions + n - 1]
+                valid = tokens >= 0
+                positions, keys = positions[valid], prefix[valid] * self._base + tokens[valid]
+                reference_keys = self._keys[n - 1]
+                found = np.searchsorted(reference_keys, keys)
+                found = np.minimum(found, max(len(reference_keys) - 1, 0))
+                matched = (reference_keys[found] == keys) if len(reference_keys) else np.zeros(len(keys), dtype=bool)
+                positions, prefix = positions[matched], found[matched]
+
+            # Clipped counts per (candidate, n-gram)
+            pairs, counts = np.unique(sample[positions] * len(self._keys[n - 1]) + prefix, return_counts=True)
+            if len(pairs):
+                owners, ngrams = np.divmod(pairs, len(self._keys[n - 1]))
+                clipped = np.minimum(counts, self._counts[n - 1][ngrams])
+                numerators[:, n - 1] = np.bincount(owners, weights=clipped, minlength=len(candidates))
+
+            if bounded and n < self.max_n:
+                precision = np.maximum(numerators[:, n - 1] / denominators[:, n - 1], sys.float_info.min)
+                log_bound += self.weights[n - 1] * np.log(precision)
+                below = active & (bp * np.exp(log_bound) < threshold)
+                if below.any():
+                    active &= ~below
+                    keep = active[sample[positions]]
+                    positions, prefix = positions[keep], prefix[keep]
+
+        scores = np.empty(len(candidates))
+        for index, candidate in enumerate(candidates):
+            if active[index] or numerators[index, 0] == 0:
+                scores[index] = self._combine(candidate, numerators[index], denominators[index], bp[index])
+            else:
+                self.early_exits += 1
+                scores[index] = bp[index] * math.exp(log_bound[index])
+
+        return scores
+
+    def _brevity_penalty(self, hyp_len: int) -> float:
+        from nltk.translate.bleu_score import brevity_penalty
+        return brevity_penalty(len(self.reference), hyp_len)
+
+    def _combine(self, candidate: List[str], numerators: np.ndarray, denominators: np.ndarray, bp: float) -> float:
+        # Same arithmetic as nltk.translate.bleu_score.corpus_bleu
+        from nltk.translate.bleu_score import Fraction
+
+        if numerators[0] == 0:
+            return 0
+        p_n = [
+            Fraction(int(numerator), int(denominator), _normalize=False)
+            for numerator, denominator in zip(numerators, denominators)
+        ]
+        p_n = self.smoothing_function(
+            p_n, references=[self.reference], hypothesis=candidate, hyp_len=len(candidate)
+        )
+
+        weights = self.weights
+        if self.auto_reweigh and len(candidate) < 4 and weights == (0.25, 0.25, 0.25, 0.25):
+            weights = (1 / len(candidate),) * len(candidate)
+
+        s = (w_i * math.log(p_i) for w_i, p_i in zip(weights, p_n) if p_i > 0)
+        return bp * math.exp(math.fsum(s))
@@ -0,0 +1,248 @@
+import multiprocessing
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+
+from ..utils.lru import LRUCache, content_key
+
+COMPONENTS = ('ngram_match_score', 'weighted_ngram_match_score', 'syntax_match_score', 'dataflow_match_score')
+
+# The language names of our CLI mapped to the names codebleu expects
+CODEBLEU_LANGS = {'csharp': 'c_sharp'}
+
+_worker_evaluator = None
+
+
+def _split(code: str) -> List[str]:
+    return code.split()
+
+
+def _subtrees(root_node) -> List[str]:
+    # Same traversal as codebleu.syntax_match.corpus_syntax_match
+    sexps = []
+    stack = [root_node]
+    while stack:
+        node = stack.pop()
+        sexps.append(str(node))
+        for child in node.children:
+            if len(child.children) != 0:
+                stack.append(child)
+    return sexps
+
+
+class CodeBLEUEvaluator:
+    """
+    Sentence-level CodeBLEU for many (reference, prediction) pairs at once.
+
+    Scores are identical to calling ``calc_codebleu([reference], [prediction])``
+    for every pair, but the tokens, keyword weights, AST subtrees and data
+    flow of each reference are computed once and kept in an LRU cache keyed
+    by a hash of the reference, so a reference shared by several pairs is
+    parsed once. With ``workers > 1`` the pairs are scored in chunks on a
+    process pool; pairs with the same reference go to the same chunk, so a
+    chunk grows past ``chunk_size`` when one reference has more pairs.
+    Like codebleu itself, the data-flow match of a few pairs depends on
+    the string hash seed, so it may differ between worker processes.
+
+    Args:
+        lang: Language of the code, as accepted by codebleu (``csharp`` is mapped to ``c_sharp``)
+        weights: Weights of the n-gram, weighted n-gram, syntax and data-flow matches
+        tokenizer: Tokenizer of the n-gram matches; defaults to whitespace splitting
+        workers: Number of worker processes
+        chunk_size: Target number of pairs sent to a worker at a time
+        cache_size: Maximum number of references kept per process
+    """
+
+    def __init__(
+        self,
+        lang: str = 'python',
+        weights: Tuple[float, float, float, float] = (0.25, 0.25, 0.25, 0.25),
+        tokenizer: Callable[[str], List[str]] = None,
+        workers: int = 1,
+        chunk_size: int = 256,
+        cache_size: int = 65536
+    ):
+        self.lang = CODEBLEU_LANGS.get(lang, lang)
+        self.weights = tuple(weights)
+        self.tokenizer = tokenizer if tokenizer is not None else _split
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.cache_size = cache_size
+
+        self._parser = None
+        self._keywords = None
+        self._references = LRUCache(cache_size)
+
+    def __getstate__(self):
+        # Parsers cannot be pickled; workers build their own
+        state = self.__dict__.copy()
+        state['_parser'] = None
+        state['_references'] = LRUCache(self.cache_size)
+        return state
+
+    def evaluate(self, references: List[str], predictions: List[str]) -> Dict[str, Any]:
+        """
+        Score every pair and aggregate in one pass.
+
+        Args:
+            references: Reference code of each pair
+            predictions: Predicted code of each pair
+
+        Returns:
+            Dictionary with ``per_sample`` (one CodeBLEU dict per pair, in
+            input order) and ``aggregate`` (the mean of every score)
+        """
+        if len(references) != len(predictions):
+            raise ValueError("Number of references and predictions should be the same")
+
+        per_sample = self.score_pairs(list(zip(references, predictions)))
+        return {'per_sample': per_sample, 'aggregate': self.aggregate(per_sample)}
+
+    def score_pairs(self, pairs: List[Tuple[str, str]]) -> List[Dict[str, float]]:
+        if self.workers <= 1 or len(pairs) <= self.chunk_size:
+            return [self.score(reference, prediction) for reference, prediction in pairs]
+
+        chunks = _chunk_by_reference(pairs, self.chunk_size)
+
+        scores = [None] * len(pairs)
+        context = multiprocessing.get_context('spawn')
+        with context.Pool(self.workers, initializer=_init_worker, initargs=(self,)) as pool:
+            chunk_pairs = ([pairs[i] for i in chunk] for chunk in chunks)
+            for chunk, chunk_scores in zip(chunks, pool.imap(_score_chunk, chunk_pairs)):
+                for index, score in zip(chunk, chunk_scores):
+                    scores[index] = score
+
+        return scores
+
+    def score(self, reference: str, prediction: str) -> Dict[str, float]:
+        from codebleu import bleu, weighted_ngram_match
+
+        ref = self._reference(reference)
+        hyp = self._analyze(prediction.strip())
+        hyp_tokens = self.tokenizer(prediction.strip())
+
+        ngram_match_score = bleu.corpus_bleu([[ref['tokens']]], [hyp_tokens])
+        weighted_ngram_match_score = weighted_ngram_match.corpus_bleu(
+            [[[ref['tokens'], ref['token_weights']]]], [hyp_tokens]
+        )
+
+        syntax_match_score = sum(1 for sexp in ref['sexps'] if sexp in hyp['sexp_set']) / len(ref['sexps'])
+
+        if ref['dataflow']:
+            candidate_dataflow = list(hyp['dataflow'])
+            match_count = 0
+            for dataflow in ref['dataflow']:
+                if dataflow in candidate_dataflow:
+                    match_count += 1
+                    candidate_dataflow.remove(dataflow)
+            dataflow_match_score = match_count / len(ref['dataflow'])
+        else:
+            dataflow_match_score = 0
+
+        alpha, beta, gamma, theta = self.weights
+        code_bleu_score = (
+            alpha * ngram_match_score
+            + beta * weighted_ngram_match_score
+            + gamma * syntax_match_score
+            + theta * (dataflow_match_score or 1)
+        )
+
+        return {
+            'codebleu': code_bleu_score,
+            'ngram_match_score': ngram_match_score,
+            'weighted_ngram_match_score': weighted_ngram_match_score,
+            'syntax_match_score': syntax_match_score,
+            'dataflow_match_score': dataflow_match_score,
+        }
+
+    @staticmethod
+    def aggregate(per_sample: List[Dict[str, float]]) -> Dict[str, float]:
+        if not per_sample:
+            return {key: float('nan') for key in ('codebleu',) + COMPONENTS}
+        return {
+            key: float(np.mean([score[key] for score in per_sample]))
+            for key in ('codebleu',) + COMPONENTS
+        }
+
+    def stats(self) -> Dict[str, float]:
+        return self._references.stats()
+
+    def _reference(self, reference: str) -> Dict[str, Any]:
+        key = content_key(reference)
+
+        cached = self._references.get(key)
+        if cached is not None:
+            return cached
+
+        reference = reference.strip()
+        tokens = self.tokenizer(reference)
+        keywords = self._keyword_set()
+
+        entry = self._analyze(reference)
+        entry['tokens'] = tokens
+        entry['token_weights'] = {token: 1 if token in keywords else 0.2 for token in tokens}
+
+        self._references.put(key, entry)
+
+        return entry
+
+    def _analyze(self, code: str) -> Dict[str, Any]:
+        """AST subtrees and normalized data flow of code, as codebleu computes them."""
+        from codebleu.dataflow_match import get_data_flow, normalize_dataflow
+        from codebleu.parser import remove_comments_and_docstrings
+
+        parser = self._get_parser()
+        try:
+            code = remove_comments_and_docstrings(code, self.lang)
+        except Exception:
+            pass
+
+        sexps = _subtrees(parser[0].parse(bytes(code, 'utf8')).root_node)
+        return {
+            'sexps': sexps,
+            'sexp_set': set(sexps),
+            'dataflow': normalize_dataflow(get_data_flow(code, parser)),
+        }
+
+    def _get_parser(self):
+        if self._parser is None:
+            from tree_sitter import Parser
+            from codebleu.dataflow_match import dfg_function
+            from codebleu.utils import get_tree_sitter_language
+
+            parser = Parser()
+            parser.language = get_tree_sitter_language(self.lang)
+            self._parser = [parser, dfg_function[self.lang]]
+        return self._parser
+
+    def _keyword_set(self) -> set:
+        if self._keywords is None:
+            from codebleu.codebleu import PACKAGE_DIR
+
+            with open(PACKAGE_DIR / 'keywords' / (self.lang + '.txt'), 'r', encoding='utf-8') as f:
+                self._keywords = {line.strip() for line in f}
+        return self._keywords
+
+
+def _chunk_by_reference(pairs: List[Tuple[str, str]], chunk_size: int) -> List[List[int]]:
+    """Indices of pairs in chunks of about chunk_size, never splitting the pairs of one reference."""
+    groups = {}
+    for index, (reference, _) in enumerate(pairs):
+        groups.setdefault(reference, []).append(index)
+
+    chunks = [[]]
+    for indices in groups.values():
+        if chunks[-1] and len(chunks[-1]) + len(indices) > chunk_size:
+            chunks.append([])
+        chunks[-1].extend(indices)
+    return chunks
+
+
+def _init_worker(evaluator: CodeBLEUEvaluator):
+    global _worker_evaluator
+    _worker_evaluator = evaluator
+    _worker_evaluator.workers = 1
+
+
+def _score_chunk(pairs: List[Tuple[str, str]]) -> List[Dict[str, float]]:
+    return [_worker_evaluator.score(reference, prediction) for reference, prediction in pairs]
@@ -1,25 +1,26 @@
 from typing import List, Dict, Any
 import numpy as np
-from nltk.translate.bleu_score import sentence_bleu
-from codebleu import calc_codebleu
 
-def calculate_codebleu(original: str, adversarial: str) -> float:
-    original_tokens = tokenize_code(original)
-    adversarial_tokens = tokenize_code(adversarial)
-    
-    score = calc_codebleu(
-        [original_tokens],
-        [adversarial_tokens],
-        lang="python",
-        weights=(0.25, 0.25, 0.25, 0.25)
-    )
-    
-    return score
+from .corpus_codebleu import CodeBLEUEvaluator
+
+_evaluators: Dict[Any, CodeBLEUEvaluator] = {}
+
+def _get_evaluator(lang: str, workers: int = 1) -> CodeBLEUEvaluator:
+    # Evaluators are kept per language so that their reference caches are reused across calls
+    key = (lang, workers)
+    if key not in _evaluators:
+        _evaluators[key] = CodeBLEUEvaluator(lang=lang, tokenizer=tokenize_code, workers=workers)
+    return _evaluators[key]
+
+def calculate_codebleu(original: str, adversarial: str, lang: str = "python") -> float:
+    evaluator = _get_evaluator(lang)
+    return evaluator.score(original, adversarial)["codebleu"]
 
 def calculate_bleu(reference: str, candidate: str) -> float:
     reference_tokens = reference.split()
     candidate_tokens = candidate.split()
     
+    from nltk.translate.bleu_score import sentence_bleu
     score = sentence_bleu(
         [reference_tokens],
         candidate_tokens,
@@ -32,18 +33,31 @@ def calculate_attack_metrics(
     original_outputs: List[str],
     adversarial_outputs: List[str],
     original_codes: List[str],
-    adversarial_codes: List[str]
+    adversarial_codes: List[str],
+    lang: str = "python",
+    workers: int = 1
 ) -> Dict[str, float]:
     metrics = {}
+    n = len(original_outputs)
+    
+    # All three groups of pairs are scored in one pass; each of the original
+    # outputs is parsed once and reused for both of its pairs
+    evaluator = _get_evaluator(lang, workers)
+    pairs = (
+        list(zip(original_outputs, original_codes))
+        + list(zip(original_outputs, adversarial_outputs))
+        + list(zip(original_codes, adversarial_codes))
+    )
+    scores = [score["codebleu"] for score in evaluator.score_pairs(pairs)]
+    original_scores = scores[:n]
+    adversarial_scores = scores[n:2 * n]
+    similarities = scores[2 * n:]
     
-    original_scores = [calculate_codebleu(ref, cand) for ref, cand in zip(original_outputs, original_codes)]
-    adversarial_scores = [calculate_codebleu(ref, cand) for ref, cand in zip(original_outputs, adversarial_outputs)]
     metrics["performance_drop"] = np.mean([orig - adv for orig, adv in zip(original_scores, adversarial_scores)])
     
     success_count = sum(1 for orig, adv in zip(original_scores, adversarial_scores) if orig - adv > 0)
     metrics["success_rate"] = success_count / len(original_scores)
     
-    similarities = [calculate_codebleu(orig, adv) for orig, adv in zip(original_codes, adversarial_codes)]
     metrics["code_similarity"] = np.mean(similarities)
     
     perturbations = [len(set(orig.split()) - set(adv.split())) for orig, adv in zip(original_codes, adversarial_codes)]
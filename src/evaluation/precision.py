@@ -0,0 +1,106 @@
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from src.attacks.attack import CodeAttack
+from src.attacks.importance import ImportanceContext
+
+
+def _rank_correlation(scores_a: np.ndarray, scores_b: np.ndarray) -> float:
+    n = min(len(scores_a), len(scores_b))
+    if n < 2:
+        return 1.0
+
+    ranks_a = np.argsort(np.argsort(scores_a[:n]))
+    ranks_b = np.argsort(np.argsort(scores_b[:n]))
+    if np.all(ranks_a == ranks_b):
+        return 1.0
+
+    return float(np.corrcoef(ranks_a, ranks_b)[0, 1])
+
+
+def _top_k_overlap(scores_a: np.ndarray, scores_b: np.ndarray, k: int) -> float:
+    n = min(len(scores_a), len(scores_b))
+    k = min(k, n)
+    if k == 0:
+        return 1.0
+
+    top_a = set(np.argsort(-scores_a[:n])[:k].tolist())
+    top_b = set(np.argsort(-scores_b[:n])[:k].tolist())
+    return len(top_a & top_b) / k
+
+
+def _run_profile(
+    model,
+    tokenizer,
+    codes: List[str],
+    profile: str,
+    batch_size: int,
+    attack_kwargs: Dict[str, Any]
+) -> Tuple[List[ImportanceContext], List[Dict[str, Any]]]:
+    attack = CodeAttack(model=model, tokenizer=tokenizer, precision=profile, **attack_kwargs)
+    results, importance = attack.generate_batch_with_importance(codes, batch_size=batch_size)
+
+    # Invalid snippets are not attacked, so their importance is computed on its own
+    skipped = [i for i, context in enumerate(importance) if context is None]
+    for start in range(0, len(skipped), batch_size):
+        chunk = skipped[start:start + batch_size]
+        for i, context in zip(chunk, attack.compute_importance([codes[i] for i in chunk])):
+            importance[i] = context
+
+    return importance, results
+
+
+def compare_precision_profiles(
+    model,
+    tokenizer,
+    codes: List[str],
+    profiles: tuple = ('fp32', 'bf16'),
+    top_k: int = 5,
+    batch_size: int = 8,
+    **attack_kwargs: Any
+) -> Dict[str, float]:
+    """
+    Measure how much a reduced-precision profile changes the attack.
+
+    The first profile is the reference; it is attacked once and every other
+    profile is compared with it. The importance rankings are the ones each
+    attack ran with, so no profile repeats its importance pass. For every
+    other profile the report gives the mean Spearman correlation and top-k
+    overlap of the per-sample token-importance rankings, and the fraction of
+    samples whose chosen adversarial code differs from the reference.
+
+    Args:
+        model: Victim seq2seq model
+        tokenizer: Tokenizer of the victim model
+        codes: Snippets used for the comparison
+        profiles: Precision profiles to compare, reference first
+        top_k: Number of most important tokens compared per sample
+        batch_size: Number of snippets attacked together in one batch
+        **attack_kwargs: Extra keyword arguments forwarded to CodeAttack
+
+    Returns:
+        Dictionary of metrics keyed by ``<profile>_<metric>``
+    """
+    # The reference is attacked once and every other profile is compared with it
+    reference_importance, reference_results = _run_profile(
+        model, tokenizer, codes, profiles[0], batch_size, attack_kwargs
+    )
+
+    report = {}
+    for profile in profiles[1:]:
+        importance, results = _run_profile(model, tokenizer, codes, profile, batch_size, attack_kwargs)
+        report[f'{profile}_importance_rank_correlation'] = float(np.mean([
+            _rank_correlation(a.token_scores, b.token_scores)
+            for a, b in zip(reference_importance, importance)
+        ]))
+        report[f'{profile}_importance_top_k_overlap'] = float(np.mean([
+            _top_k_overlap(a.token_scores, b.token_scores, top_k)
+            for a, b in zip(reference_importance, importance)
+        ]))
+        report[f'{profile}_adversarial_change_rate'] = float(np.mean([
+            a['adversarial_code'] != b['adversarial_code']
+            for a, b in zip(reference_results, results)
+        ]))
+
+    return report
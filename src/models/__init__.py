@@ -1 +1,2 @@
-from .target_model import TargetModel 
\ No newline at end of file
+from .target_model import TargetModel
+from .query_cache import CachedQueryModel, QueryBudgetExceeded
\ No newline at end of file
@@ -0,0 +1,104 @@
+from typing import Any, Callable, Dict, List
+
+from ..utils.lru import LRUCache, content_key
+
+_MISSING = object()
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """Raised when a sample would need more target model queries than its budget allows."""
+
+
+class CachedQueryModel:
+    """
+    Memoizing query layer around a black-box target model.
+
+    Outputs are cached in a bounded LRU keyed by a hash of the queried code,
+    so repeated queries for the same snippet never reach the model. Only
+    cache misses are real queries; they are counted per sample and, when
+    ``query_budget`` is set, a sample that needs more than that many raises
+    ``QueryBudgetExceeded``.
+
+    Args:
+        model: Callable mapping a code string to the model output
+        max_entries: Maximum number of cached outputs
+        query_budget: Maximum number of real queries per sample, or None
+    """
+
+    def __init__(self, model: Callable[[str], Any], max_entries: int = 4096, query_budget: int = None):
+        self.model = model
+        self.max_entries = max_entries
+        self.query_budget = query_budget
+
+        self._cache = LRUCache(max_entries)
+        self.sample_queries = 0
+
+    key = staticmethod(content_key)
+
+    def start_sample(self):
+        """Reset the per-sample query counter; the cache is kept."""
+        self.sample_queries = 0
+
+    def remaining(self) -> float:
+        if self.query_budget is None:
+            return float("inf")
+        return self.query_budget - self.sample_queries
+
+    def __call__(self, code: str) -> Any:
+        key = self.key(code)
+
+        output = self._cache.get(key, _MISSING)
+        if output is not _MISSING:
+            return output
+
+        if self.remaining() <= 0:
+            raise QueryBudgetExceeded(
+                f"Query budget of {self.query_budget} exhausted for this sample"
+            )
+
+        output = self.model(code)
+        self.sample_queries += 1
+        self._cache.put(key, output)
+        return output
+
+    def query_batch(self, codes: List[str]) -> List[Any]:
+        """
+        Answer several codes with at most one batched call to the model.
+
+        The model receives the list of uncached codes and must return their
+        outputs stacked along the first axis. If the budget runs out part-way,
+        only the outputs of the leading codes that fit are returned.
+        """
+        # Cached outputs, or _MISSING for the uncached codes in pending
+        found = []
+        pending = {}
+        for code in codes:
+            key = self.key(code)
+            if key in pending:
+                output = _MISSING
+            else:
+                output = self._cache.get(key, _MISSING)
+                if output is _MISSING:
+                    # Cut the batch where the uncached codes would exceed the budget
+                    if len(pending) >= self.remaining():
+                        break
+                    pending[key] = code
+            found.append((key, output))
+
+        outputs = {}
+        if pending:
+            outputs = dict(zip(pending, self.model(list(pending.values()))))
+            self.sample_queries += len(pending)
+            for key, output in outputs.items():
+                self._cache.put(key, output)
+
+        return [outputs[key] if output is _MISSING else output for key, output in found]
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            **self._cache.stats(),
+            "cached": len(self._cache),
+        }
+
+    def clear(self):
+        self._cache.clear()
@@ -0,0 +1,113 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+def _model_size(model) -> int:
+    size = 0
+    for tensor in list(model.parameters()) + list(model.buffers()):
+        size += tensor.numel() * tensor.element_size()
+    return size
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of pretrained models and tokenizers.
+
+    Models are loaded on first request and shared by every caller asking for
+    the same (name, class, dtype, device). When ``memory_cap`` is set, the
+    least recently used models are evicted once the loaded weights exceed
+    it; ``evict_idle`` drops models that have not been used for a while.
+    A name that is an existing directory is loaded from disk only, so it
+    never touches the network.
+
+    Args:
+        memory_cap: Maximum total size of the loaded weights in bytes, or None
+        local_files_only: Never download, even for hub names
+    """
+
+    def __init__(self, memory_cap: int = None, local_files_only: bool = False):
+        self.memory_cap = memory_cap
+        self.local_files_only = local_files_only
+        self._models = OrderedDict()
+        self._tokenizers = {}
+        self._lock = threading.RLock()
+
+    def _pretrained_kwargs(self, name: str) -> dict:
+        return {'local_files_only': self.local_files_only or os.path.isdir(name)}
+
+    def get_model(self, name: str, model_class=None, dtype=None, device: str = 'cpu'):
+        if model_class is None:
+            from transformers import AutoModelForMaskedLM
+            model_class = AutoModelForMaskedLM
+
+        key = (name, model_class.__name__, str(dtype), str(device))
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is None:
+                kwargs = self._pretrained_kwargs(name)
+                if dtype is not None:
+                    kwargs['torch_dtype'] = dtype
+                model = model_class.from_pretrained(name, **kwargs).to(device)
+                model.eval()
+                entry = {'model': model, 'size': _model_size(model)}
+                self._models[key] = entry
+                self._enforce_memory_cap(keep=key)
+
+            entry['last_used'] = time.monotonic()
+            self._models.move_to_end(key)
+            return entry['model']
+
+    def get_tokenizer(self, name: str):
+        with self._lock:
+            tokenizer = self._tokenizers.get(name)
+            if tokenizer is None:
+                from transformers import AutoTokenizer
+                tokenizer = AutoTokenizer.from_pretrained(name, **self._pretrained_kwargs(name))
+                self._tokenizers[name] = tokenizer
+            return tokenizer
+
+    def memory_usage(self) -> int:
+        with self._lock:
+            return sum(entry['size'] for entry in self._models.values())
+
+    def loaded(self) -> list:
+        with self._lock:
+            return list(self._models)
+
+    def evict_idle(self, max_idle_seconds: float) -> int:
+        """Drop models unused for longer than max_idle_seconds; returns how many were evicted."""
+        now = time.monotonic()
+        with self._lock:
+            idle = [key for key, entry in self._models.items()
+                    if now - entry['last_used'] > max_idle_seconds]
+            for key in idle:
+                del self._models[key]
+            return len(idle)
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+            self._tokenizers.clear()
+
+    def _enforce_memory_cap(self, keep):
+        if self.memory_cap is None:
+            return
+        while self.memory_usage() > self.memory_cap:
+            victim = next((key for key in self._models if key != keep), None)
+            if victim is None:
+                break
+            del self._models[victim]
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> ModelRegistry:
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelRegistry()
+        return _registry
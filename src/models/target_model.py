@@ -8,6 +8,12 @@ class TargetModel:
         self.token_scores = {}
     
     def __call__(self, code):
+        # A list of inputs is answered with the outputs stacked along the first axis
+        if isinstance(code, (list, tuple)):
+            return np.stack([self._score(c) for c in code])
+        return self._score(code)
+    
+    def _score(self, code):
         if "[MASK]" in code:
             return np.array([self.base_score - 0.2])
         else:
@@ -15,4 +21,4 @@ class TargetModel:
             for token in tokens:
                 if token not in self.token_scores:
                     self.token_scores[token] = random.uniform(0.5, 0.9)
-            return np.array([self.token_scores.get(tokens[0], self.base_score)]) 
\ No newline at end of file
+            return np.array([self.token_scores.get(tokens[0], self.base_score)])
@@ -1,3 +1,9 @@
-from .file_utils import save_results, load_code_from_file, save_code_to_file
+from .file_utils import (
+    save_results, stream_results, load_results, JsonlResultsWriter,
+    load_code_from_file, save_code_to_file
+)
 
-__all__ = ['save_results', 'load_code_from_file', 'save_code_to_file'] 
\ No newline at end of file
+__all__ = [
+    'save_results', 'stream_results', 'load_results', 'JsonlResultsWriter',
+    'load_code_from_file', 'save_code_to_file'
+] 
\ No newline at end of file
@@ -1,19 +1,164 @@
 import os
+import mmap
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Tuple, Union
 import json
 
-def load_dataset(dataset_name: str) -> List[Dict[str, Any]]:
+import numpy as np
+
+DATASET_DIR = Path('data/datasets')
+
+def shard_bounds(num_items: int, index: int, count: int) -> Tuple[int, int]:
+    """
+    Contiguous [start, end) range of the items that belong to one shard.
+    
+    Shard sizes differ by at most one item.
+    
+    Args:
+        num_items: Total number of items
+        index: Zero-based shard index
+        count: Number of shards
+        
+    Returns:
+        Tuple of (start, end) item indices
+    """
+    base, remainder = divmod(num_items, count)
+    start = index * base + min(index, remainder)
+    end = start + base + (1 if index < remainder else 0)
+    return start, end
+
+def build_index(dataset_path: Union[str, Path]) -> Path:
+    """
+    Build the sidecar byte-offset index of a JSONL dataset.
+    
+    The index stores the offset of every non-empty line followed by the file
+    size, as little-endian uint64, so record k spans offsets[k]:offsets[k + 1].
+    
+    Args:
+        dataset_path: Path of the JSONL file
+        
+    Returns:
+        Path of the written index file
+    """
+    dataset_path = Path(dataset_path)
+    index_path = dataset_path.with_name(dataset_path.name + '.idx')
+    
+    offsets = []
+    position = 0
+    with open(dataset_path, 'rb') as f:
+        for line in f:
+            if line.strip():
+                offsets.append(position)
+            position += len(line)
+    offsets.append(position)
+    
+    np.asarray(offsets, dtype='<u8').tofile(index_path)
+    return index_path
+
+class JsonlDataset:
+    """
+    Lazily read JSONL dataset with random access through a byte-offset index.
+    
+    Records are parsed only when accessed. The sidecar index (``<file>.idx``)
+    is built on first use and rebuilt when it is older than the data file;
+    both files are memory-mapped, so jumping to record k costs one seek and
+    one line parse regardless of k.
+    
+    Args:
+        dataset_path: Path of the JSONL file
+    """
+    def __init__(self, dataset_path: Union[str, Path]):
+        self.path = Path(dataset_path)
+        self.index_path = self.path.with_name(self.path.name + '.idx')
+        
+        if (not self.index_path.exists()
+                or self.index_path.stat().st_mtime < self.path.stat().st_mtime):
+            build_index(self.path)
+        
+        self.offsets = np.memmap(self.index_path, dtype='<u8', mode='r')
+        if int(self.offsets[-1]) != self.path.stat().st_size:
+            build_index(self.path)
+            self.offsets = np.memmap(self.index_path, dtype='<u8', mode='r')
+        
+        self._file = open(self.path, 'rb')
+        self._data = (
+            mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            if self.offsets[-1] > 0 else b''
+        )
+    
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+    
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            return list(self.iter_range(start, stop))
+        
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError(f"Record {key} out of range for {len(self)} records")
+        
+        return json.loads(self._data[int(self.offsets[key]):int(self.offsets[key + 1])])
+    
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return self.iter_range(0, len(self))
+    
+    def iter_range(self, start: int, end: int) -> Iterator[Dict[str, Any]]:
+        """
+        Yield records start..end-1 without parsing anything before start.
+        """
+        end = min(end, len(self))
+        for k in range(start, end):
+            yield json.loads(self._data[int(self.offsets[k]):int(self.offsets[k + 1])])
+    
+    def shard(self, index: int, count: int) -> Iterator[Dict[str, Any]]:
+        """
+        Yield the records of shard index of count.
+        """
+        return self.iter_range(*shard_bounds(len(self), index, count))
+    
+    def close(self):
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._file.close()
+
+def iter_dataset(dataset_name: str, start: int = 0) -> Iterator[Dict[str, Any]]:
+    """
+    Lazily yield the records of a dataset, optionally resuming at record start.
+    
+    Args:
+        dataset_name: Name of the dataset to load
+        start: Index of the first record to yield
+        
+    Returns:
+        Iterator over code examples with their metadata
+    """
+    dataset = load_dataset(dataset_name)
+    if isinstance(dataset, JsonlDataset):
+        return dataset.iter_range(start, len(dataset))
+    return iter(dataset[start:])
+
+def load_dataset(dataset_name: str) -> Union[List[Dict[str, Any]], JsonlDataset]:
     """
     Load dataset from the specified name.
     
+    A ``<name>.jsonl`` file is preferred and returned as a lazily read,
+    indexable JsonlDataset; otherwise ``<name>.json`` is loaded into memory.
+    
     Args:
         dataset_name: Name of the dataset to load
         
     Returns:
         List of code examples with their metadata
     """
-    dataset_path = Path('data/datasets') / f'{dataset_name}.json'
+    jsonl_path = DATASET_DIR / f'{dataset_name}.jsonl'
+    if jsonl_path.exists():
+        return JsonlDataset(jsonl_path)
+    
+    dataset_path = DATASET_DIR / f'{dataset_name}.json'
     
     if not dataset_path.exists():
         raise FileNotFoundError(f"Dataset {dataset_name} not found at {dataset_path}")
@@ -23,16 +168,28 @@ def load_dataset(dataset_name: str) -> List[Dict[str, Any]]:
     
     return dataset
 
-def save_dataset(dataset: List[Dict[str, Any]], dataset_name: str):
+def save_dataset(dataset: List[Dict[str, Any]], dataset_name: str, format: str = 'json'):
     """
     Save dataset to file.
     
     Args:
-        dataset: List of code examples with their metadata
+        dataset: List (or any iterable) of code examples with their metadata
         dataset_name: Name to save the dataset as
+        format: ``json`` for a single JSON array, ``jsonl`` for one record per
+            line plus its byte-offset index
     """
-    dataset_path = Path('data/datasets') / f'{dataset_name}.json'
+    if format not in ('json', 'jsonl'):
+        raise ValueError(f"Unknown dataset format: {format}")
+    
+    dataset_path = DATASET_DIR / f'{dataset_name}.{format}'
     dataset_path.parent.mkdir(parents=True, exist_ok=True)
     
+    if format == 'jsonl':
+        with open(dataset_path, 'w', encoding='utf-8') as f:
+            for record in dataset:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        build_index(dataset_path)
+        return
+    
     with open(dataset_path, 'w', encoding='utf-8') as f:
-        json.dump(dataset, f, indent=2) 
\ No newline at end of file
+        json.dump(dataset, f, indent=2)
@@ -12,6 +12,128 @@ def save_results(results, output_file):
     with open(output_file, 'w', encoding='utf-8') as f:
         json.dump(results, f, indent=2, ensure_ascii=False)
 
+class JsonlResultsWriter:
+    """
+    Ghi kết quả tấn công theo định dạng JSON Lines, mỗi kết quả một dòng
+    
+    Kết quả được giữ trong bộ đệm và ghi ra file sau mỗi buffer_size kết quả,
+    nên khi chương trình dừng giữa chừng chỉ mất phần chưa được flush.
+    
+    Args:
+        output_file: Đường dẫn file output
+        buffer_size: Số kết quả giữ trong bộ đệm trước khi ghi ra file
+        append: Ghi tiếp vào cuối file thay vì ghi đè
+    """
+    def __init__(self, output_file, buffer_size=64, append=False):
+        self.output_file = output_file
+        self.buffer_size = buffer_size
+        self.count = 0
+        self._buffer = []
+        self._file = open(output_file, 'a' if append else 'w', encoding='utf-8')
+    
+    def write(self, result):
+        self._buffer.append(json.dumps(result, ensure_ascii=False))
+        self.count += 1
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+    
+    def flush(self):
+        if self._buffer:
+            self._file.write('\n'.join(self._buffer) + '\n')
+            self._buffer = []
+        self._file.flush()
+    
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+def stream_results(results, output_file, buffer_size=64):
+    """
+    Lưu kết quả tấn công vào file JSON Lines ngay khi chúng được tạo ra
+    
+    Args:
+        results: Iterable các dictionary kết quả
+        output_file: Đường dẫn file output
+        buffer_size: Số kết quả giữ trong bộ đệm trước khi ghi ra file
+        
+    Returns:
+        Số kết quả đã ghi
+    """
+    with JsonlResultsWriter(output_file, buffer_size=buffer_size) as writer:
+        for result in results:
+            writer.write(result)
+    return writer.count
+
+def load_results(results_file):
+    """
+    Đọc lần lượt từng kết quả từ file JSON Lines
+    
+    Args:
+        results_file: Đường dẫn file kết quả
+        
+    Returns:
+        Iterator các dictionary kết quả
+    """
+    with open(results_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def _line_start(f, end, block_size=65536):
+    # Scan backwards block by block for the start of the line ending at end
+    position = end
+    while position > 0:
+        step = min(block_size, position)
+        f.seek(position - step)
+        index = f.read(step).rfind(b'\n')
+        if index >= 0:
+            return position - step + index + 1
+        position -= step
+    return 0
+
+def repair_results(results_file):
+    """
+    Cắt bỏ dòng cuối ghi dở của file JSON Lines, để có thể ghi tiếp an toàn
+    
+    Khi chương trình dừng giữa lúc ghi, dòng cuối có thể thiếu ký tự xuống
+    dòng hoặc không phải JSON hợp lệ. Dòng đó được cắt bỏ; nếu nó là JSON
+    hợp lệ nhưng chỉ thiếu ký tự xuống dòng thì được giữ lại và thêm '\n'.
+    Chỉ dòng cuối được đọc, nên bộ nhớ không phụ thuộc kích thước file;
+    dòng lỗi ở giữa file sẽ gây ValueError khi đọc lại bằng load_results.
+    
+    Args:
+        results_file: Đường dẫn file kết quả
+    """
+    with open(results_file, 'r+b') as f:
+        end = f.seek(0, os.SEEK_END)
+        if end == 0:
+            return
+        
+        f.seek(end - 1)
+        has_newline = f.read(1) == b'\n'
+        start = _line_start(f, end - 1 if has_newline else end)
+        f.seek(start)
+        line = f.read(end - start)
+        if not line.strip():
+            return
+        
+        try:
+            json.loads(line)
+        except ValueError:
+            f.truncate(start)
+            return
+        
+        if not has_newline:
+            # The last result is complete and only its newline is missing
+            f.write(b'\n')
+
 def load_code_from_file(file_path):
     """
     Đọc code từ file
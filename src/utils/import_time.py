@@ -0,0 +1,127 @@
+import argparse
+import os
+import subprocess
+import sys
+from typing import Any, Dict, List
+
+# Dependencies that must only be imported when they are actually used
+HEAVY_MODULES = ('torch', 'transformers', 'sklearn', 'Levenshtein', 'nltk', 'codebleu')
+
+# Cold import budget for any of our modules, in seconds
+IMPORT_TIME_BUDGET = 1.5
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """
+    Parse the output of ``python -X importtime``.
+
+    Args:
+        stderr: Standard error of the interpreter run with ``-X importtime``
+
+    Returns:
+        One dict per imported module with its self and cumulative time in
+        seconds and its nesting depth, in the order the imports finished
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3:
+            continue
+
+        self_us, cumulative_us, name = fields
+        if not self_us.strip().isdigit():
+            # Header line
+            continue
+
+        stripped = name.lstrip()
+        entries.append({
+            'module': stripped.strip(),
+            'self': int(self_us) / 1e6,
+            'cumulative': int(cumulative_us) / 1e6,
+            'depth': (len(name) - len(stripped) - 1) // 2,
+        })
+
+    return entries
+
+
+def measure_import(module: str, python: str = sys.executable) -> Dict[str, Any]:
+    """
+    Import ``module`` in a fresh interpreter and report where the time went.
+
+    Args:
+        module: Dotted name of the module to import
+        python: Interpreter used for the measurement
+
+    Returns:
+        Dictionary with the total import time, the heavy dependencies that
+        ended up loaded and the per-module breakdown
+    """
+    heavy = ', '.join(repr(name) for name in HEAVY_MODULES)
+    script = (
+        f"import sys, {module}\n"
+        f"print(','.join(name for name in ({heavy},) if name in sys.modules))"
+    )
+
+    result = subprocess.run(
+        [python, '-X', 'importtime', '-c', script],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+
+    entries = parse_importtime(result.stderr)
+    top_level = [entry for entry in entries if entry['depth'] == 0]
+
+    return {
+        'module': module,
+        'total': sum(entry['cumulative'] for entry in top_level),
+        'heavy_modules': [name for name in result.stdout.strip().split(',') if name],
+        'entries': entries,
+    }
+
+
+def format_report(report: Dict[str, Any], top: int = 10) -> str:
+    lines = [f"{report['module']}: {report['total'] * 1000:.1f} ms"]
+
+    if report['heavy_modules']:
+        lines.append(f"  heavy modules loaded: {', '.join(report['heavy_modules'])}")
+
+    slowest = sorted(report['entries'], key=lambda entry: entry['self'], reverse=True)[:top]
+    for entry in slowest:
+        lines.append(
+            f"  {entry['self'] * 1000:8.1f} ms self {entry['cumulative'] * 1000:8.1f} ms cumulative  {entry['module']}"
+        )
+
+    return '\n'.join(lines)
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description='Report the cold import time of our modules')
+    parser.add_argument('modules', nargs='*',
+                        default=['src.utils', 'src.utils.metrics', 'src.evaluation.metrics', 'src.attacks.attack'],
+                        help='Modules to import')
+    parser.add_argument('--top', type=int, default=10,
+                        help='Number of slowest imports listed per module')
+    parser.add_argument('--budget', type=float, default=IMPORT_TIME_BUDGET,
+                        help='Fail when a module takes longer than this many seconds to import')
+    args = parser.parse_args(argv)
+
+    failed = False
+    for module in args.modules:
+        report = measure_import(module)
+        print(format_report(report, top=args.top))
+        if report['heavy_modules'] or report['total'] > args.budget:
+            failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
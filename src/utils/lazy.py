@@ -0,0 +1,32 @@
+import importlib
+import types
+
+
+class LazyModule(types.ModuleType):
+    """
+    Module proxy that performs the real import on first attribute access.
+
+    Used for heavy optional dependencies (torch, transformers, sklearn, ...)
+    so that importing our modules, or running ``--help``, stays cheap.
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__['_module'] = None
+
+    def _load(self) -> types.ModuleType:
+        module = self.__dict__['_module']
+        if module is None:
+            module = importlib.import_module(self.__name__)
+            self.__dict__['_module'] = module
+        return module
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+
+def lazy_import(name: str) -> LazyModule:
+    return LazyModule(name)
@@ -0,0 +1,68 @@
+import hashlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable
+
+
+def content_key(text: str) -> bytes:
+    """Short digest of text, used as cache key instead of the text itself."""
+    return hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+
+
+class LRUCache:
+    """
+    Bounded mapping that evicts the least recently used entry.
+
+    Lookups through ``get`` count as hits or misses; ``put`` and ``in`` do
+    not touch the counters.
+
+    Args:
+        max_entries: Maximum number of entries kept
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None, accept: Callable[[Any], bool] = None) -> Any:
+        """
+        Cached value of key, or default.
+
+        Args:
+            key: Key to look up
+            default: Returned, and counted as a miss, when key is not cached
+            accept: Predicate a cached value must satisfy to count as a hit
+        """
+        if key in self._entries:
+            value = self._entries[key]
+            if accept is None or accept(value):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+
+        self.misses += 1
+        return default
+
+    def put(self, key: Hashable, value: Any):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
@@ -1,14 +1,22 @@
+from __future__ import annotations
+
+import math
+import sys
+from itertools import chain
 import numpy as np
-from typing import List, Dict, Any
-from Levenshtein import distance
-from sklearn.metrics.pairwise import cosine_similarity
-import torch
-from transformers import PreTrainedTokenizer
+from typing import TYPE_CHECKING, List, Dict, Any
+
+from .lru import LRUCache, content_key
+
+if TYPE_CHECKING:
+    import torch
+    from transformers import PreTrainedTokenizer
 
 def calculate_similarity(code1: str, code2: str) -> float:
     tokens1 = code1.split()
     tokens2 = code2.split()
     
+    from Levenshtein import distance
     lev_distance = distance(tokens1, tokens2)
     
     max_len = max(len(tokens1), len(tokens2))
@@ -18,6 +26,94 @@ def calculate_similarity(code1: str, code2: str) -> float:
     similarity = 1 - (lev_distance / max_len)
     return similarity
 
+class SimilarityEngine:
+    """
+    One-vs-many version of calculate_similarity for a fixed original.
+
+    The original is split once and reused for every candidate. With a
+    threshold, comparisons are bounded: the distance computation stops as
+    soon as the candidate can no longer reach the threshold, and such a
+    candidate gets a similarity strictly below the threshold instead of its
+    exact value. Results are cached by a hash of the candidate.
+
+    Args:
+        original: Code every candidate is compared with
+        threshold: Similarity threshold used for bounded comparisons, or None
+        cache_size: Maximum number of cached candidates
+    """
+    def __init__(self, original: str, threshold: float = None, cache_size: int = 4096):
+        from Levenshtein import distance
+        self._distance = distance
+
+        self.original = original
+        self.threshold = threshold
+        self.cache_size = cache_size
+
+        self._original = original.split()
+
+        self._cache = LRUCache(cache_size)
+        self.early_exits = 0
+
+    def _max_distance(self, max_len: int) -> int:
+        """Largest distance whose similarity, computed as in calculate_similarity, reaches the threshold."""
+        cutoff = int((1 - self.threshold) * max_len)
+        while cutoff >= 0 and 1 - (cutoff / max_len) < self.threshold:
+            cutoff -= 1
+        while cutoff + 1 <= max_len and 1 - ((cutoff + 1) / max_len) >= self.threshold:
+            cutoff += 1
+        return cutoff
+
+    def score(self, candidate: str, bounded: bool = None) -> float:
+        """
+        Similarity of candidate to the original.
+
+        Args:
+            candidate: Code to compare
+            bounded: Stop early below the threshold; defaults to whether a threshold is set
+        """
+        bounded = self.threshold is not None if bounded is None else bounded
+        key = content_key(candidate)
+
+        # Bounds are only reused by bounded lookups
+        cached = self._cache.get(key, accept=lambda entry: entry[1] or bounded)
+        if cached is not None:
+            return cached[0]
+
+        tokens = candidate.split()
+        max_len = max(len(self._original), len(tokens))
+
+        if max_len == 0:
+            similarity, exact = 1.0, True
+        elif bounded and self.threshold is not None:
+            cutoff = self._max_distance(max_len)
+            if cutoff < 0 or abs(len(self._original) - len(tokens)) > cutoff:
+                # The length difference alone already exceeds the cutoff
+                lev_distance = cutoff + 1
+            else:
+                lev_distance = self._distance(self._original, tokens, score_cutoff=cutoff)
+            exact = lev_distance <= cutoff
+            if not exact:
+                self.early_exits += 1
+            similarity = 1 - (lev_distance / max_len)
+        else:
+            similarity = 1 - (self._distance(self._original, tokens) / max_len)
+            exact = True
+
+        self._cache.put(key, (similarity, exact))
+
+        return similarity
+
+    __call__ = score
+
+    def score_batch(self, candidates: List[str], bounded: bool = None) -> np.ndarray:
+        return np.array([self.score(candidate, bounded) for candidate in candidates], dtype=float)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            **self._cache.stats(),
+            'early_exits': self.early_exits
+        }
+
 def calculate_attack_metrics(results: List[Dict[str, Any]]) -> Dict[str, float]:
     performance_drop = np.mean([1 - r['similarity'] for r in results])
     success_rate = np.mean([r['similarity'] < 0.5 for r in results])
@@ -31,50 +127,255 @@ def calculate_attack_metrics(results: List[Dict[str, Any]]) -> Dict[str, float]:
         'avg_perturbations': avg_perturbations
     }
 
+class IncrementalAttackMetrics:
+    """
+    Running version of calculate_attack_metrics that is updated one result at a time.
+    """
+    def __init__(self):
+        self.count = 0
+        self.similarity_sum = 0.0
+        self.success_count = 0
+        self.perturbations_sum = 0
+    
+    def update(self, result: Dict[str, Any]):
+        self.count += 1
+        self.similarity_sum += result['similarity']
+        self.success_count += result['similarity'] < 0.5
+        self.perturbations_sum += result['perturbations']
+    
+    def compute(self) -> Dict[str, float]:
+        if self.count == 0:
+            nan = float('nan')
+            return {
+                'performance_drop': nan,
+                'success_rate': nan,
+                'code_similarity': nan,
+                'avg_perturbations': nan
+            }
+        
+        code_similarity = self.similarity_sum / self.count
+        return {
+            'performance_drop': 1 - code_similarity,
+            'success_rate': self.success_count / self.count,
+            'code_similarity': code_similarity,
+            'avg_perturbations': self.perturbations_sum / self.count
+        }
+
+def _encode_padded(texts: List[str], tokenizer: PreTrainedTokenizer) -> tuple:
+    """Token ids of every text as a (len(texts), max_len) array padded with -1, and the lengths."""
+    ids = tokenizer(texts, add_special_tokens=False)["input_ids"]
+    lengths = np.fromiter((len(row) for row in ids), dtype=np.int64, count=len(ids))
+    
+    padded = np.full((len(ids), int(lengths.max(initial=0))), -1, dtype=np.int64)
+    padded[np.arange(padded.shape[1]) < lengths[:, None]] = np.fromiter(
+        chain.from_iterable(ids), dtype=np.int64, count=int(lengths.sum())
+    )
+    return padded, lengths
+
+def _ngram_matches(
+    hypotheses: np.ndarray,
+    references: np.ndarray,
+    max_n: int
+) -> np.ndarray:
+    """
+    Clipped n-gram matches of every hypothesis row against the same row of references, as a (rows, max_n) array.
+    
+    Every n-gram of a row gets an exact integer code: the code of its (n-1)-gram
+    prefix (which already encodes the row) combined with its last token id,
+    renumbered with np.unique over the hypotheses and references together.
+    """
+    rows = len(hypotheses)
+    base = int(max(hypotheses.max(initial=-1), references.max(initial=-1))) + 1
+    matches = np.zeros((rows, max_n), dtype=np.int64)
+    
+    hyp_codes = np.where(hypotheses >= 0, np.arange(rows)[:, None] * base + hypotheses, -1)
+    ref_codes = np.where(references >= 0, np.arange(rows)[:, None] * base + references, -1)
+    owners = None
+    
+    for n in range(1, max_n + 1):
+        if n > 1:
+            # Extend every (n-1)-gram by the token that follows it
+            hyp_codes = np.where(
+                (hyp_codes[:, :-1] >= 0) & (hypotheses[:, n - 1:] >= 0),
+                hyp_codes[:, :-1] * base + hypotheses[:, n - 1:],
+                -1
+            )
+            ref_codes = np.where(
+                (ref_codes[:, :-1] >= 0) & (references[:, n - 1:] >= 0),
+                ref_codes[:, :-1] * base + references[:, n - 1:],
+                -1
+            )
+        
+        hyp_valid = hyp_codes >= 0
+        ref_valid = ref_codes >= 0
+        if not hyp_valid.any():
+            break
+        
+        codes, inverse = np.unique(
+            np.concatenate([hyp_codes[hyp_valid], ref_codes[ref_valid]]), return_inverse=True
+        )
+        inverse = inverse.reshape(-1)
+        owners = codes // base if n == 1 else owners[codes // base]
+        
+        hyp_index = inverse[:hyp_valid.sum()]
+        ref_index = inverse[hyp_valid.sum():]
+        clipped = np.minimum(
+            np.bincount(hyp_index, minlength=len(codes)),
+            np.bincount(ref_index, minlength=len(codes))
+        )
+        matches[:, n - 1] = np.bincount(owners, weights=clipped, minlength=rows)
+        
+        # Renumber so that codes stay small as n grows
+        hyp_codes = np.full(hyp_codes.shape, -1, dtype=np.int64)
+        hyp_codes[hyp_valid] = hyp_index
+        ref_codes = np.full(ref_codes.shape, -1, dtype=np.int64)
+        ref_codes[ref_valid] = ref_index
+    
+    return matches
+
+def _bleu(matches: np.ndarray, hyp_len: int, ref_len: int, weights: tuple) -> float:
+    # Same arithmetic as nltk sentence_bleu without smoothing
+    if matches[0] == 0:
+        return 0
+    if hyp_len > ref_len:
+        bp = 1
+    else:
+        bp = math.exp(1 - ref_len / hyp_len)
+    
+    s = (
+        w_i * math.log(int(m) / max(1, hyp_len - i) if m else sys.float_info.min)
+        for i, (w_i, m) in enumerate(zip(weights, matches))
+    )
+    return bp * math.exp(math.fsum(s))
+
 def calculate_model_metrics(
     model_outputs: List[str],
     target_outputs: List[str],
-    tokenizer: PreTrainedTokenizer
+    tokenizer: PreTrainedTokenizer,
+    batch_size: int = 8192
 ) -> Dict[str, float]:
-    model_tokens = [tokenizer.tokenize(output) for output in model_outputs]
-    target_tokens = [tokenizer.tokenize(output) for output in target_outputs]
+    """
+    Exact match, positional token accuracy and BLEU of model outputs against targets.
     
-    exact_match = np.mean([
-        m == t for m, t in zip(model_tokens, target_tokens)
-    ])
+    Outputs are encoded in batches without special tokens into padded id
+    arrays, so tokens are compared by id. Exact match and token accuracy are
+    array operations and BLEU (four orders, no smoothing, as nltk
+    sentence_bleu) is computed from batched n-gram codes.
     
-    token_accuracy = np.mean([
-        sum(1 for a, b in zip(m, t) if a == b) / max(len(m), len(t))
-        for m, t in zip(model_tokens, target_tokens)
-    ])
+    Args:
+        model_outputs: Outputs of the model
+        target_outputs: Expected outputs
+        tokenizer: Tokenizer the outputs are split with
+        batch_size: Number of pairs encoded at a time
+    """
+    weights = (0.25, 0.25, 0.25, 0.25)
+    exact_match = []
+    token_accuracy = []
+    bleu_score = []
+    
+    for start in range(0, len(model_outputs), batch_size):
+        model_ids, model_lengths = _encode_padded(model_outputs[start:start + batch_size], tokenizer)
+        target_ids, target_lengths = _encode_padded(target_outputs[start:start + batch_size], tokenizer)
+        
+        # Compare positions both sides have, padding both arrays to a common width
+        width = max(model_ids.shape[1], target_ids.shape[1])
+        model_ids = np.pad(model_ids, ((0, 0), (0, width - model_ids.shape[1])), constant_values=-1)
+        target_ids = np.pad(target_ids, ((0, 0), (0, width - target_ids.shape[1])), constant_values=-1)
+        
+        shared = np.arange(width) < np.minimum(model_lengths, target_lengths)[:, None]
+        correct = ((model_ids == target_ids) & shared).sum(axis=1)
+        longest = np.maximum(model_lengths, target_lengths)
+        
+        exact_match.append((model_lengths == target_lengths) & (correct == model_lengths))
+        token_accuracy.append(np.divide(correct, longest, out=np.ones(len(correct)), where=longest > 0))
+        
+        matches = _ngram_matches(model_ids, target_ids, len(weights))
+        bleu_score.append(np.array([
+            _bleu(row, hyp_len, ref_len, weights)
+            for row, hyp_len, ref_len in zip(matches, model_lengths.tolist(), target_lengths.tolist())
+        ], dtype=float))
     
-    from nltk.translate.bleu_score import sentence_bleu
-    bleu_score = np.mean([
-        sentence_bleu([t], m)
-        for m, t in zip(model_tokens, target_tokens)
-    ])
+    if not exact_match:
+        nan = float('nan')
+        return {'exact_match': nan, 'token_accuracy': nan, 'bleu_score': nan}
     
     return {
-        'exact_match': exact_match,
-        'token_accuracy': token_accuracy,
-        'bleu_score': bleu_score
+        'exact_match': np.mean(np.concatenate(exact_match)),
+        'token_accuracy': np.mean(np.concatenate(token_accuracy)),
+        'bleu_score': np.mean(np.concatenate(bleu_score))
     }
 
+def _normalize_rows(embeddings: torch.Tensor) -> torch.Tensor:
+    import torch.nn.functional as F
+    return F.normalize(embeddings.float(), dim=-1, eps=1e-8)
+
 def calculate_embedding_similarity(
     embeddings1: torch.Tensor,
-    embeddings2: torch.Tensor
+    embeddings2: torch.Tensor,
+    clip: bool = True,
+    chunk_size: int = 1024
 ) -> float:
-    emb1 = embeddings1.cpu().numpy()
-    emb2 = embeddings2.cpu().numpy()
+    """
+    Mean cosine similarity over all (N, M) pairs of rows, clipped to [0, 1].
     
-    emb1 = emb1 / (np.linalg.norm(emb1, axis=1, keepdims=True) + 1e-8)
-    emb2 = emb2 / (np.linalg.norm(emb2, axis=1, keepdims=True) + 1e-8)
+    The similarity matrix is never materialized: with clipping it is built
+    ``chunk_size`` rows at a time on the tensors' device, and without it the
+    mean is the dot product of the summed unit rows. Identical embeddings
+    return 1.0 before any pairwise work.
     
-    similarity = cosine_similarity(emb1, emb2)
+    Args:
+        embeddings1: (N, D) embeddings
+        embeddings2: (M, D) embeddings
+        clip: Clip every similarity to [0, 1] before averaging
+        chunk_size: Number of rows of embeddings1 compared at a time
+    """
+    import torch
     
-    if np.array_equal(emb1, emb2):
+    emb1 = _normalize_rows(embeddings1)
+    emb2 = emb1 if embeddings2 is embeddings1 else _normalize_rows(embeddings2)
+    if emb1 is emb2 or torch.equal(emb1, emb2):
         return 1.0
+    
+    with torch.inference_mode():
+        if not clip:
+            total = emb1.double().sum(dim=0) @ emb2.double().sum(dim=0)
+            return float(total) / (len(emb1) * len(emb2))
         
-    similarity = np.clip(similarity, 0, 1)
-        
-    return float(similarity.mean()) 
\ No newline at end of file
+        total = torch.zeros((), dtype=torch.float64, device=emb1.device)
+        for start in range(0, len(emb1), chunk_size):
+            block = emb1[start:start + chunk_size] @ emb2.T
+            total += block.clamp_(0, 1).sum(dtype=torch.float64)
+    
+    return float(total) / (len(emb1) * len(emb2))
+
+def paired_embedding_similarity(
+    embeddings1: torch.Tensor,
+    embeddings2: torch.Tensor,
+    chunk_size: int = 65536
+) -> torch.Tensor:
+    """
+    Cosine similarity of each row of embeddings1 with the same row of embeddings2.
+    
+    Args:
+        embeddings1: (N, D) embeddings, e.g. of original snippets
+        embeddings2: (N, D) embeddings, e.g. of their adversarial versions
+        chunk_size: Number of rows normalized at a time
+    
+    Returns:
+        (N,) tensor of similarities on the device of the inputs
+    """
+    import torch
+    
+    if embeddings1.shape != embeddings2.shape:
+        raise ValueError("Both embedding batches should have the same shape")
+    
+    similarities = []
+    with torch.inference_mode():
+        for start in range(0, len(embeddings1), chunk_size):
+            emb1 = _normalize_rows(embeddings1[start:start + chunk_size])
+            emb2 = _normalize_rows(embeddings2[start:start + chunk_size])
+            similarities.append((emb1 * emb2).sum(dim=-1))
+    
+    if not similarities:
+        return embeddings1.new_zeros(0, dtype=torch.float32)
+    return torch.cat(similarities)
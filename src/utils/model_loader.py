@@ -1,7 +1,11 @@
-from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
-import torch
+import copy
+from src.utils.lazy import lazy_import
 
-def load_model(model_name: str):
+torch = lazy_import('torch')
+
+def load_model(model_name: str, with_quantized: bool = False):
+    from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+    
     tokenizer = AutoTokenizer.from_pretrained(model_name)
     
     model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
@@ -9,9 +13,22 @@ def load_model(model_name: str):
     device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
     model = model.to(device)
     
+    if with_quantized:
+        return model, tokenizer, quantize_model(model)
+    
     return model, tokenizer
 
+def quantize_model(model):
+    """
+    Build a dynamically quantized int8 copy of a model for cheap candidate pre-screening.
+    
+    Linear layers get int8 weights and dynamically quantized activations; the
+    copy always lives on the CPU and leaves the original model untouched.
+    """
+    quantized = copy.deepcopy(model).to('cpu').eval()
+    return torch.ao.quantization.quantize_dynamic(quantized, {torch.nn.Linear}, dtype=torch.qint8)
+
 def save_model(model, tokenizer, model_name: str):
     model.save_pretrained(f'data/models/{model_name}')
     
-    tokenizer.save_pretrained(f'data/models/{model_name}') 
\ No newline at end of file
+    tokenizer.save_pretrained(f'data/models/{model_name}')
\ No newline at end of file
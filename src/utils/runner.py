@@ -0,0 +1,120 @@
+import os
+import multiprocessing
+from functools import partial
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+from src.attacks.attack import CodeAttack
+from src.utils.lazy import lazy_import
+from src.utils.model_loader import load_model
+
+torch = lazy_import('torch')
+
+_worker_attack = None
+
+
+def parse_shard(spec: str) -> Tuple[int, int]:
+    """
+    Parse a shard specification of the form ``i/k``.
+
+    Args:
+        spec: Zero-based shard index and number of shards, e.g. ``0/4``
+
+    Returns:
+        Tuple of (shard index, number of shards)
+    """
+    try:
+        index, count = (int(part) for part in spec.split('/'))
+    except ValueError:
+        raise ValueError(f"Invalid shard '{spec}', expected the form i/k")
+
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Invalid shard '{spec}', expected 0 <= i < k")
+
+    return index, count
+
+
+def build_attack(model_name: str, attack_kwargs: Dict[str, Any]) -> CodeAttack:
+    """
+    Load the victim model and wrap it in a CodeAttack.
+
+    ``attack_kwargs`` may contain ``quantized_screening=True`` to also build an
+    int8 copy of the model that pre-screens candidates.
+    """
+    attack_kwargs = dict(attack_kwargs)
+    if attack_kwargs.pop('quantized_screening', False):
+        model, tokenizer, screening_model = load_model(model_name, with_quantized=True)
+        attack_kwargs['screening_model'] = screening_model
+    else:
+        model, tokenizer = load_model(model_name)
+
+    return CodeAttack(model=model, tokenizer=tokenizer, **attack_kwargs)
+
+
+def _init_worker(model_name: str, attack_kwargs: Dict[str, Any], num_threads: int):
+    global _worker_attack
+
+    # Pin intra-op threads so that workers do not oversubscribe the cores
+    torch.set_num_threads(num_threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass
+
+    _worker_attack = build_attack(model_name, attack_kwargs)
+
+
+def _attack_chunk(codes: List[str], batch_size: int) -> List[Dict[str, Any]]:
+    return _worker_attack.generate_batch(codes, batch_size=batch_size)
+
+
+def _chunked(codes: Iterable[str], size: int) -> Iterator[List[str]]:
+    iterator = iter(codes)
+    chunk = list(islice(iterator, size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(iterator, size))
+
+
+def iter_attack_results(
+    codes: Iterable[str],
+    model_name: str,
+    attack_kwargs: Dict[str, Any],
+    workers: int = 1,
+    batch_size: int = 8
+) -> Iterator[Dict[str, Any]]:
+    """
+    Attack every snippet and yield the results in input order as they complete.
+
+    With ``workers > 1`` each worker process loads its own copy of the model
+    through ``load_model`` and pulls chunks of ``batch_size`` snippets from the
+    pool's shared task queue.
+
+    Args:
+        codes: Source snippets to attack, consumed lazily
+        model_name: Name or local path of the victim model
+        attack_kwargs: Keyword arguments forwarded to ``CodeAttack``
+        workers: Number of worker processes
+        batch_size: Number of snippets attacked together in one batch
+
+    Yields:
+        One result dict per snippet
+    """
+    chunks = _chunked(codes, batch_size)
+
+    if workers <= 1:
+        attack = build_attack(model_name, attack_kwargs)
+        for chunk in chunks:
+            yield from attack.generate_batch(chunk, batch_size=batch_size)
+        return
+
+    num_threads = max(1, (os.cpu_count() or 1) // workers)
+    context = multiprocessing.get_context('spawn')
+
+    with context.Pool(
+        workers,
+        initializer=_init_worker,
+        initargs=(model_name, attack_kwargs, num_threads)
+    ) as pool:
+        for results in pool.imap(partial(_attack_chunk, batch_size=batch_size), chunks):
+            yield from results
@@ -1,54 +1,85 @@
-from typing import List
+from typing import Dict, Iterator, List, Set, Tuple
 import re
 
+KEYWORDS: Dict[str, Set[str]] = {
+    "java": {"public", "private", "protected", "static", "final", "class", "interface",
+            "extends", "implements", "void", "int", "float", "double", "boolean",
+            "char", "byte", "short", "long", "if", "else", "for", "while", "do",
+            "switch", "case", "break", "continue", "return", "try", "catch", "finally",
+            "throw", "throws", "new", "this", "super", "import", "package"},
+    "python": {"def", "class", "if", "elif", "else", "for", "while", "try", "except",
+              "finally", "with", "import", "from", "as", "pass", "break", "continue",
+              "return", "yield", "raise", "global", "nonlocal", "True", "False", "None"},
+    "csharp": {"public", "private", "protected", "internal", "static", "readonly",
+              "class", "interface", "struct", "enum", "void", "int", "float", "double",
+              "bool", "char", "byte", "short", "long", "if", "else", "for", "while",
+              "do", "switch", "case", "break", "continue", "return", "try", "catch",
+              "finally", "throw", "using", "namespace", "new", "this", "base"}
+}
+
+# (text, type, (start, end))
+TypedToken = Tuple[str, str, Tuple[int, int]]
+
 class CodeTokenizer:
-    def __init__(self):
+    def __init__(self, language: str = "java"):
+        if language not in KEYWORDS:
+            raise ValueError(f"Unsupported language: {language}")
+
+        self.language = language
+        keywords = "|".join(sorted(KEYWORDS[language], key=lambda keyword: (-len(keyword), keyword)))
+
         self.patterns = {
-            "keyword": r"\b(public|private|protected|static|final|class|interface|extends|implements|void|int|float|double|boolean|char|byte|short|long|if|else|for|while|do|switch|case|break|continue|return|try|catch|finally|throw|throws|new|this|super|import|package)\b",
+            "keyword": rf"\b({keywords})\b",
             "operator": r"(\+\+|--|\+=|-=|\*=|\/=|%=|&=|\|=|\^=|<<=|>>=|==|!=|<=|>=|&&|\|\||!|&|\||\^|~|<<|>>|\+|-|\*|\/|%|=|<|>)",
             "bracket": r"([\(\)\{\}\[\]])",
             "number": r"\b\d+(\.\d+)?\b",
             "string": r'"[^"]*"|\'[^\']*\'',
             "identifier": r"\b[a-zA-Z_][a-zA-Z0-9_]*\b"
         }
-        
+        self._fullmatch = {
+            token_type: re.compile(pattern) for token_type, pattern in self.patterns.items()
+        }
+
+        # One alternation tried in the same order as the patterns above. Every
+        # alternative starts with a word character or none, so dropping the
+        # leading \b keeps the same matches; anything else is a single
+        # unknown character. Whitespace is matched so that finditer never
+        # skips a character.
+        self._master = re.compile("|".join([
+            r"(?P<whitespace>\s+)",
+            rf"(?P<keyword>(?:{keywords})\b)",
+            rf"(?P<operator>{self.patterns['operator']})",
+            rf"(?P<bracket>{self.patterns['bracket']})",
+            r"(?P<number>\d+(?:\.\d+)?\b)",
+            rf"(?P<string>{self.patterns['string']})",
+            r"(?P<identifier>[a-zA-Z_][a-zA-Z0-9_]*\b)",
+            r"(?P<unknown>.)",
+        ]), re.DOTALL)
+
+    def _iter_matches(self, code: str) -> Iterator[re.Match]:
+        for match in self._master.finditer(code):
+            if match.lastgroup != "whitespace":
+                yield match
+
     def tokenize(self, code: str) -> List[str]:
-        tokens = []
-        current_pos = 0
-        
-        while current_pos < len(code):
-            if code[current_pos].isspace():
-                current_pos += 1
-                continue
-                
-            matched = False
-            for pattern in self.patterns.values():
-                match = re.match(pattern, code[current_pos:])
-                if match:
-                    token = match.group(0)
-                    tokens.append(token)
-                    current_pos += len(token)
-                    matched = True
-                    break
-                    
-            if not matched:
-                tokens.append(code[current_pos])
-                current_pos += 1
-                
-        return tokens
-    
+        return [match.group() for match in self._iter_matches(code)]
+
+    def tokenize_with_types(self, code: str) -> List[TypedToken]:
+        """Tokenize in one pass, returning each token with its type and (start, end) span."""
+        return [(match.group(), match.lastgroup, match.span()) for match in self._iter_matches(code)]
+
     def get_token_type(self, token: str) -> str:
-        for token_type, pattern in self.patterns.items():
-            if re.fullmatch(pattern, token):
+        for token_type, pattern in self._fullmatch.items():
+            if pattern.fullmatch(token):
                 return token_type
-                
+
         return "unknown"
-    
+
     def is_valid_identifier(self, token: str) -> bool:
-        return bool(re.fullmatch(self.patterns["identifier"], token))
-    
+        return bool(self._fullmatch["identifier"].fullmatch(token))
+
     def is_valid_number(self, token: str) -> bool:
-        return bool(re.fullmatch(self.patterns["number"], token))
-    
+        return bool(self._fullmatch["number"].fullmatch(token))
+
     def is_valid_string(self, token: str) -> bool:
-        return bool(re.fullmatch(self.patterns["string"], token)) 
\ No newline at end of file
+        return bool(self._fullmatch["string"].fullmatch(token))
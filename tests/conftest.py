@@ -17,4 +17,44 @@ def attack(model_and_tokenizer):
 
 @pytest.fixture(scope="session")
 def device():
-    return torch.device('cuda' if torch.cuda.is_available() else 'cpu') 
\ No newline at end of file
+    return torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+
+
+@pytest.fixture(scope="session")
+def tiny_mlm(tmp_path_factory):
+    """Path to a tiny randomly initialized RoBERTa MLM with its own BPE tokenizer, built offline."""
+    from tokenizers import ByteLevelBPETokenizer
+    from transformers import RobertaConfig, RobertaForMaskedLM, RobertaTokenizerFast
+    
+    corpus = [
+        "def add(a, b): return a + b",
+        "def multiply(x, y): return x * y",
+        "def subtract(first, second): return first - second",
+        "total = count + value",
+    ] * 10
+    
+    path = tmp_path_factory.mktemp("tiny_mlm")
+    bpe = ByteLevelBPETokenizer()
+    bpe.train_from_iterator(
+        corpus, vocab_size=300, min_frequency=1,
+        special_tokens=["<s>", "<pad>", "</s>", "<unk>", "<mask>"]
+    )
+    bpe.save_model(str(path))
+    tokenizer = RobertaTokenizerFast.from_pretrained(path)
+    tokenizer.save_pretrained(path)
+    
+    torch.manual_seed(0)
+    config = RobertaConfig(
+        vocab_size=len(tokenizer), hidden_size=32, num_hidden_layers=1,
+        num_attention_heads=2, intermediate_size=64, max_position_embeddings=130,
+        pad_token_id=tokenizer.pad_token_id
+    )
+    RobertaForMaskedLM(config).save_pretrained(path)
+    return str(path)
+
+
+@pytest.fixture(scope="session")
+def tiny_t5():
+    """A small randomly initialized T5 and its offline BPE tokenizer, as used by the benchmarks."""
+    from benchmarks.fixtures import build_tiny_t5
+    return build_tiny_t5()
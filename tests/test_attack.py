@@ -1,9 +1,16 @@
+import re
 import pytest
+import numpy as np
 import torch
 from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
 from src.attacks.attack import CodeAttack
+from src.attacks.importance import ImportanceContext
+from src.attacks.alignment import TokenAlignment
+from src.attacks.beam_search import BeamSearch, perturbation_budget
 from src.constraints.code_constraints import CodeConstraints
+from src.constraints.syntax_validator import SyntaxValidator
 from src.utils.tokenizer import CodeTokenizer
+from src.utils.model_loader import quantize_model
 
 class MockModel:
     def __init__(self):
@@ -214,4 +221,235 @@ def test_long_code(attack):
     assert result['original_code'] == code
     assert result['adversarial_code'] != code
     assert result['similarity'] >= 0.5
-    assert result['perturbations'] > 0 
\ No newline at end of file
+    assert result['perturbations'] > 0 
+
+def test_importance_context_derived_scores():
+    importance = ImportanceContext(np.array([0.0, 1.0, 0.5]))
+    
+    assert np.array_equal(importance.substitution_scores, importance.token_scores)
+    assert np.array_equal(importance.deletion_scores, importance.token_scores)
+    assert np.allclose(importance.insertion_scores, [0.0, 0.5, 0.75, 0.5])
+    assert np.allclose(importance.reordering_scores, [0.5, 0.75])
+    
+    # Derived scores are computed once and reused by every strategy
+    assert importance.insertion_scores is importance.insertion_scores
+
+
+def test_batched_candidate_scoring_matches_single(tiny_t5):
+    model, tokenizer = tiny_t5
+    attack = CodeAttack(model=model, tokenizer=tokenizer)
+    code = "def add(a, b): return a + b"
+    inputs = attack.tokenizer(code, return_tensors='pt')
+    with torch.no_grad():
+        original_output = attack.model.generate(**inputs)
+    
+    candidates = [
+        "def add(a, b): return a - b",
+        "def add(a, b):\n    pass\n    return a + b",
+        "def add(x, y): return x * y"
+    ]
+    
+    decoder_targets = attack._decoder_targets(original_output)
+    batched = attack._score_candidates(candidates, decoder_targets)
+    single = np.concatenate([attack._score_candidates([c], decoder_targets) for c in candidates])
+    
+    # Padding must not change the loss of any candidate
+    assert np.allclose(batched, single, atol=1e-4)
+
+def test_shared_decoder_targets_match_per_candidate_targets(tiny_t5):
+    model, tokenizer = tiny_t5
+    attack = CodeAttack(model=model, tokenizer=tokenizer, candidate_batch_size=2)
+    inputs = tokenizer("def add(a, b): return a + b", return_tensors='pt')
+    with torch.no_grad():
+        original_output = model.generate(**inputs)
+    assert (original_output[0, 1:] != tokenizer.pad_token_id).all()
+    
+    candidates = [
+        "def add(a, b): return a - b",
+        "def add(a, b):\n    pass\n    return a + b",
+        "def add(x, y): return x * y"
+    ]
+    
+    # Targets built once from a padded output and broadcast over every chunk
+    padded = torch.cat([original_output, torch.full((1, 3), tokenizer.pad_token_id)], dim=1)
+    shared = attack._score_candidates(candidates, attack._decoder_targets(padded))
+    
+    expected = []
+    for candidate in candidates:
+        batch = tokenizer(candidate, return_tensors='pt')
+        with torch.no_grad():
+            logits = model(**batch, decoder_input_ids=original_output[:, :-1].clone()).logits
+        expected.append(torch.nn.functional.cross_entropy(logits[0], original_output[0, 1:]).item())
+    
+    assert np.allclose(shared, expected, atol=1e-5)
+
+def test_generate_batch(tiny_t5):
+    model, tokenizer = tiny_t5
+    attack = CodeAttack(model=model, tokenizer=tokenizer)
+    codes = [
+        "def add(a, b): return a + b",
+        "def invalid(:",
+        "def multiply(x, y): return x * y"
+    ]
+    
+    results = attack.generate_batch(codes, batch_size=2)
+    
+    assert len(results) == len(codes)
+    assert [r['original_code'] for r in results] == codes
+    assert results[1]['adversarial_code'] == codes[1]
+    assert results[1]['similarity'] == 1.0
+    
+    # Batching must not change what a single-sample run produces
+    for code, result in zip(codes, results):
+        assert attack.generate(code) == result
+
+def test_token_alignment_splicing(tiny_t5):
+    _, tokenizer = tiny_t5
+    code = "def add(a, b): return a + b"
+    alignment = TokenAlignment.from_code(tokenizer, code)
+    
+    texts = [alignment.text(i) for i in range(len(alignment))]
+    assert "".join(texts) == code.replace(" ", "")
+    
+    plus = texts.index("+")
+    assert alignment.splice([alignment.substitute(plus, "-")]) == "def add(a, b): return a - b"
+    assert alignment.splice([alignment.delete(plus)]) == "def add(a, b): return a  b"
+    assert alignment.splice([alignment.insert(0, "pass")]) == "pass def add(a, b): return a + b"
+
+def test_token_insertion_keeps_original_tokens(tiny_t5):
+    _, tokenizer = tiny_t5
+    code = "def multiply(x, y): return x * y"
+    alignment = TokenAlignment.from_code(tokenizer, code)
+    lexemes = re.findall(r"\w+|\S", code)
+    
+    texts = [alignment.text(i) for i in range(len(alignment))]
+    comma = texts.index(",")
+    assert alignment.splice([alignment.insert(comma, "pass")]) == "def multiply(x pass , y): return x * y"
+    
+    # Subwords inside an identifier are not insertion points
+    assert not all(alignment.starts_word(i) for i in range(len(alignment)))
+    for i in range(len(alignment)):
+        if not alignment.starts_word(i):
+            continue
+        inserted = re.findall(r"\w+|\S", alignment.splice([alignment.insert(i, "pass")]))
+        inserted.remove("pass")
+        assert inserted == lexemes
+
+def test_syntax_validator():
+    validator = SyntaxValidator("python")
+    
+    assert validator.is_valid("def add(a, b): return a + b")
+    assert validator.is_valid("""
+    def complex_function(a, b):
+        if a > b:
+            return a
+        return b
+    """)
+    
+    # Rejected by the lexical prefilter before reaching ast.parse
+    assert not validator.is_valid("def add(a, b: return a + b")
+    assert not validator.is_valid("s = 'unterminated")
+    assert not validator.is_valid("x = 1\n    y = 2")
+    assert validator.stats()["prefilter_rejects"] == 3
+    
+    # Passes the prefilter but fails to parse
+    assert not validator.is_valid("def add(a, b) return a + b")
+    assert validator.stats()["parse_rejects"] == 1
+    
+    # Repeated candidates are served from the cache
+    assert validator.is_valid("def add(a, b): return a + b")
+    assert validator.stats()["hits"] == 1
+
+def test_syntax_validator_java():
+    validator = SyntaxValidator("java")
+    
+    assert validator.is_valid("""
+    public class Test {
+        public static void main(String[] args) {
+            System.out.println("}"); // {
+        }
+    }
+    """)
+    assert not validator.is_valid("public class Test { public void f( { } }")
+    assert not validator.is_valid("public class Test { /* unterminated }")
+
+def test_perturbation_budget():
+    assert perturbation_budget(0.4, 10) == 4
+    assert perturbation_budget(0.01, 10) == 1
+    assert perturbation_budget(3, 100) == 3
+
+def test_beam_search_combines_edits_within_budget():
+    code = "a + b - c"
+    alignment = TokenAlignment(code, [(0, 1), (2, 3), (4, 5), (6, 7), (8, 9)])
+    proposals = [
+        alignment.substitute(1, "*"),
+        alignment.substitute(3, "/"),
+        alignment.substitute(0, "x"),
+    ]
+    
+    # Each operator change hurts the model; renaming a variable does not
+    def score_fn(candidates):
+        return np.array([c.count("*") + c.count("/") for c in candidates], dtype=float)
+    
+    search = BeamSearch(
+        score_fn=score_fn,
+        validate_fn=lambda c: True,
+        similarity_fn=lambda c: 1.0,
+        beam_width=2,
+        budget=2
+    )
+    assert search.search(alignment, proposals) == "a * b / c"
+    
+    search.budget = 1
+    assert search.search(alignment, proposals) in ("a * b - c", "a + b / c")
+    
+    # Candidates below the similarity threshold are pruned
+    search.budget = 2
+    search.similarity_fn = lambda c: 0.0
+    assert search.search(alignment, proposals) == code
+
+def test_beam_search_charges_the_token_cost_of_edits():
+    code = "a + b - c"
+    alignment = TokenAlignment(code, [(0, 1), (2, 3), (4, 5), (6, 7), (8, 9)])
+    proposals = [
+        alignment.insert(0, "if True: x = 1;"),
+        alignment.substitute(1, "*"),
+    ]
+    
+    search = BeamSearch(
+        score_fn=lambda candidates: np.array([len(c) for c in candidates], dtype=float),
+        validate_fn=lambda c: True,
+        similarity_fn=lambda c: 1.0,
+        budget=2,
+        cost_fn=lambda c: 6 if "if True" in c else 1
+    )
+    
+    # The insertion scores higher but perturbs more tokens than the budget allows
+    assert search.search(alignment, proposals) == "a * b - c"
+
+@pytest.mark.parametrize("max_perturbations", [2, 0.4])
+def test_generate_respects_token_budget(tiny_t5, max_perturbations):
+    from benchmarks.fixtures import make_snippets
+    model, tokenizer = tiny_t5
+    attack = CodeAttack(model=model, tokenizer=tokenizer, max_perturbations=max_perturbations)
+    
+    for code in make_snippets("short", 3):
+        result = attack.generate(code)
+        budget = perturbation_budget(max_perturbations, len(tokenizer.tokenize(code)))
+        assert result['perturbations'] <= budget
+
+def test_quantized_screening(tiny_t5):
+    model, tokenizer = tiny_t5
+    attack = CodeAttack(
+        model=model,
+        tokenizer=tokenizer,
+        screening_model=quantize_model(model),
+        rescore_top_k=2
+    )
+    
+    result = attack.generate("def add(a, b): return a + b")
+    assert result['similarity'] >= 0.5
+    assert result['screening']['disagreements'] <= result['screening']['rankings']
+    
+    stats = attack.screening_stats()
+    assert 0.0 <= stats['disagreement_rate'] <= 1.0
@@ -0,0 +1,67 @@
+import json
+import random
+import pytest
+from benchmarks.fixtures import BUCKETS, make_snippets, perturb
+from benchmarks.run import StageTimer, compare, main
+from src.constraints.syntax_validator import SyntaxValidator
+
+class Worker:
+    def step(self, value):
+        return value + 1
+
+def test_snippets_are_valid_and_grow_with_the_bucket():
+    validator = SyntaxValidator("python")
+    lengths = []
+    for bucket in BUCKETS:
+        snippets = make_snippets(bucket, 3)
+        assert snippets == make_snippets(bucket, 3)
+        assert all(validator.is_valid(code) for code in snippets)
+        assert all(validator.is_valid(perturb(code, random.Random(0))) for code in snippets)
+        lengths.append(len(snippets[0].split()))
+    assert lengths == sorted(lengths)
+
+def test_stage_timer_wraps_and_restores():
+    worker = Worker()
+    timer = StageTimer()
+    timer.wrap(worker, "step", "step")
+    
+    assert worker.step(1) == 2
+    with timer.stage("outer"):
+        worker.step(2)
+    
+    summary = timer.summary()
+    assert summary["step"]["count"] == 2
+    assert summary["outer"]["count"] == 1
+    
+    timer.restore()
+    assert "step" not in worker.__dict__
+
+def test_compare_flags_regressions():
+    baseline = {"attack": {"short": {"samples_per_second": 10.0}}, "metrics": {}}
+    faster = {"attack": {"short": {"samples_per_second": 12.0}}, "metrics": {}}
+    slower = {"attack": {"short": {"samples_per_second": 5.0}}, "metrics": {}}
+    
+    assert not compare(faster, baseline)[0]["regression"]
+    assert compare(slower, baseline)[0]["regression"]
+    assert compare(slower, baseline)[0]["ratio"] == pytest.approx(0.5)
+
+def test_main_runs_offline_and_compares_with_baseline(tmp_path, monkeypatch):
+    monkeypatch.setenv("HF_HUB_OFFLINE", "1")
+    output = tmp_path / "results.json"
+    args = ["--buckets", "short", "--samples", "2", "--repeats", "1", "--output", str(output)]
+    
+    assert main(args) == 0
+    results = json.loads(output.read_text())
+    
+    attack = results["attack"]["short"]
+    assert attack["samples"] == 2
+    assert attack["samples_per_second"] > 0
+    assert attack["stages"]["generate_outputs"]["count"] == 2
+    assert "p90" in attack["stages"]["search"]
+    assert results["metrics"]["short"]["similarity"]["samples_per_second"] > 0
+    
+    # Timings of such short runs are noisy, so no drop counts as a regression here
+    rerun = tmp_path / "rerun.json"
+    assert main(args[:-1] + [str(rerun), "--skip-attack", "--baseline", str(output), "--tolerance", "1.0"]) == 0
+    comparison = json.loads(rerun.read_text())["comparison"]
+    assert comparison and all(row["benchmark"].startswith("metrics/") for row in comparison)
@@ -0,0 +1,52 @@
+import pytest
+from nltk.translate.bleu_score import sentence_bleu, SmoothingFunction
+from src.evaluation.bleu import ReferenceBLEU
+
+REFERENCE = "def add ( a , b ) : return a + b"
+
+CANDIDATES = [
+    REFERENCE,
+    "def add ( a , b ) : return a - b",
+    "def sub ( x , y ) : return x - y",
+    "return a + b",
+    "a + b + a + b + a + b",
+    "x",
+    "",
+]
+
+@pytest.mark.filterwarnings("ignore")
+@pytest.mark.parametrize("smoothing", [None, "method1", "method2", "method4", "method7"])
+def test_matches_sentence_bleu(smoothing):
+    smoothing_function = getattr(SmoothingFunction(), smoothing) if smoothing else None
+    bleu = ReferenceBLEU(REFERENCE, smoothing_function=smoothing_function)
+    
+    scores = bleu.score_batch(CANDIDATES)
+    
+    for candidate, score in zip(CANDIDATES, scores):
+        expected = sentence_bleu([REFERENCE.split()], candidate.split(), smoothing_function=smoothing_function)
+        assert score == expected
+        assert bleu.score(candidate) == expected
+
+@pytest.mark.filterwarnings("ignore")
+def test_matches_sentence_bleu_with_weights_and_reweighing():
+    weights = (0.5, 0.3, 0.2)
+    bleu = ReferenceBLEU(REFERENCE.split(), weights=weights, auto_reweigh=True)
+    
+    for candidate in CANDIDATES:
+        expected = sentence_bleu([REFERENCE.split()], candidate.split(), weights, auto_reweigh=True)
+        assert bleu.score(candidate.split()) == expected
+
+@pytest.mark.filterwarnings("ignore")
+def test_threshold_exits_early_without_changing_decisions():
+    bleu = ReferenceBLEU(REFERENCE)
+    threshold = 0.5
+    
+    scores = bleu.score_batch(CANDIDATES, threshold=threshold)
+    
+    assert bleu.early_exits > 0
+    for candidate, score in zip(CANDIDATES, scores):
+        expected = sentence_bleu([REFERENCE.split()], candidate.split())
+        assert (score < threshold) == (expected < threshold)
+        assert bleu.is_below(candidate, threshold) == (expected < threshold)
+        if expected >= threshold:
+            assert score == expected
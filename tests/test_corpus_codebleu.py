@@ -0,0 +1,92 @@
+import pytest
+from codebleu import calc_codebleu
+from src.evaluation.corpus_codebleu import CodeBLEUEvaluator, _chunk_by_reference
+from src.evaluation.metrics import calculate_codebleu, calculate_attack_metrics, tokenize_code
+
+REFERENCES = [
+    "def add(a, b):\n    return a + b",
+    "def f(x):\n    y = x * 2\n    # double\n    return y",
+    "class A:\n    def m(self, v):\n        self.v = v\n        return self.v",
+]
+
+PREDICTIONS = [
+    "def add(a, b):\n    return a - b",
+    "def f(x):\n    y = x * 3\n    return y",
+    "class A:\n    def m(self, w):\n        self.v = w\n        return self.v",
+]
+
+def test_scores_match_calc_codebleu():
+    evaluator = CodeBLEUEvaluator()
+    
+    for reference in REFERENCES:
+        for prediction in PREDICTIONS:
+            expected = calc_codebleu([reference], [prediction], lang="python")
+            assert evaluator.score(reference, prediction) == expected
+
+def test_custom_tokenizer_matches_calc_codebleu():
+    evaluator = CodeBLEUEvaluator(tokenizer=tokenize_code)
+    
+    for reference, prediction in zip(REFERENCES, PREDICTIONS):
+        expected = calc_codebleu([reference], [prediction], lang="python", tokenizer=tokenize_code)
+        assert evaluator.score(reference, prediction) == expected
+
+def test_evaluate_caches_references():
+    evaluator = CodeBLEUEvaluator()
+    references = REFERENCES * 3
+    predictions = PREDICTIONS * 3
+    
+    results = evaluator.evaluate(references, predictions)
+    
+    assert len(results["per_sample"]) == 9
+    assert results["per_sample"][:3] == results["per_sample"][3:6]
+    assert evaluator.stats()["misses"] == 3
+    assert evaluator.stats()["hits"] == 6
+    assert results["aggregate"]["codebleu"] == pytest.approx(
+        sum(score["codebleu"] for score in results["per_sample"]) / 9
+    )
+
+def test_evaluate_rejects_mismatched_lengths():
+    with pytest.raises(ValueError):
+        CodeBLEUEvaluator().evaluate(REFERENCES, PREDICTIONS[:2])
+
+def test_process_pool_keeps_input_order():
+    references = REFERENCES * 4
+    predictions = PREDICTIONS * 4
+    
+    expected = CodeBLEUEvaluator().evaluate(references, predictions)
+    pooled = CodeBLEUEvaluator(workers=2, chunk_size=2).evaluate(references, predictions)
+    
+    # Data-flow matching in codebleu depends on the string hash seed of the
+    # process, so only the remaining components are compared exactly
+    for got, want in zip(pooled["per_sample"], expected["per_sample"]):
+        assert got["ngram_match_score"] == want["ngram_match_score"]
+        assert got["syntax_match_score"] == want["syntax_match_score"]
+
+def test_chunks_never_split_a_reference():
+    pairs = [(REFERENCES[i % 3], PREDICTIONS[i % 3]) for i in range(10)]
+    
+    chunks = _chunk_by_reference(pairs, chunk_size=3)
+    
+    assert sorted(index for chunk in chunks for index in chunk) == list(range(10))
+    for reference in REFERENCES:
+        owners = [n for n, chunk in enumerate(chunks) if any(pairs[i][0] == reference for i in chunk)]
+        assert len(owners) == 1
+
+def test_calculate_codebleu_returns_float():
+    score = calculate_codebleu(REFERENCES[0], PREDICTIONS[0])
+    
+    assert isinstance(score, float)
+    assert 0.0 < score < 1.0
+    assert calculate_codebleu(REFERENCES[0], REFERENCES[0]) == pytest.approx(1.0)
+
+def test_calculate_attack_metrics_uses_one_pass():
+    metrics = calculate_attack_metrics(
+        original_outputs=REFERENCES,
+        adversarial_outputs=PREDICTIONS,
+        original_codes=REFERENCES,
+        adversarial_codes=PREDICTIONS
+    )
+    
+    assert metrics["success_rate"] == 1.0
+    assert metrics["performance_drop"] > 0
+    assert 0.0 < metrics["code_similarity"] < 1.0
@@ -0,0 +1,55 @@
+import json
+import os
+from src.utils.data_loader import JsonlDataset, iter_dataset, load_dataset, save_dataset
+
+def make_records(n):
+    return [{'code': f"def f{i}(): return {i}", 'description': f"Function {i}"} for i in range(n)]
+
+def test_jsonl_round_trip(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    records = make_records(10)
+    save_dataset(records, 'sample', format='jsonl')
+    
+    assert (tmp_path / 'data/datasets/sample.jsonl.idx').exists()
+    
+    dataset = load_dataset('sample')
+    assert isinstance(dataset, JsonlDataset)
+    assert len(dataset) == 10
+    assert list(dataset) == records
+    
+    # Random access, slicing and resuming only touch the requested records
+    assert dataset[7] == records[7]
+    assert dataset[-1] == records[-1]
+    assert dataset[2:5] == records[2:5]
+    assert list(iter_dataset('sample', start=8)) == records[8:]
+
+def test_jsonl_shards(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    records = make_records(10)
+    save_dataset(records, 'sample', format='jsonl')
+    dataset = load_dataset('sample')
+    
+    shards = [list(dataset.shard(i, 3)) for i in range(3)]
+    assert [len(shard) for shard in shards] == [4, 3, 3]
+    assert sum(shards, []) == records
+
+def test_stale_index_is_rebuilt(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    save_dataset(make_records(3), 'sample', format='jsonl')
+    
+    dataset_path = tmp_path / 'data/datasets/sample.jsonl'
+    with open(dataset_path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps({'code': "x = 1"}) + '\n\n')
+    os.utime(tmp_path / 'data/datasets/sample.jsonl.idx', (0, 0))
+    
+    dataset = load_dataset('sample')
+    assert len(dataset) == 4
+    assert dataset[3] == {'code': "x = 1"}
+
+def test_json_dataset_still_supported(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    records = make_records(3)
+    save_dataset(records, 'sample')
+    
+    assert load_dataset('sample') == records
+    assert list(iter_dataset('sample', start=1)) == records[1:]
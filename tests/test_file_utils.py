@@ -0,0 +1,66 @@
+import pytest
+from src.utils.file_utils import JsonlResultsWriter, load_results, repair_results, stream_results
+
+def test_jsonl_results_writer_flushes_incrementally(tmp_path):
+    output_file = tmp_path / "results.jsonl"
+    
+    writer = JsonlResultsWriter(output_file, buffer_size=2)
+    writer.write({'original_code': "def add(a, b): return a + b", 'similarity': 1.0})
+    assert output_file.read_text(encoding='utf-8') == ""
+    
+    writer.write({'original_code': "def sub(a, b): return a - b", 'similarity': 0.5})
+    assert len(output_file.read_text(encoding='utf-8').splitlines()) == 2
+    
+    writer.write({'original_code': "Mã nguồn", 'similarity': 0.9})
+    writer.close()
+    
+    results = list(load_results(output_file))
+    assert len(results) == 3
+    assert results[2]['original_code'] == "Mã nguồn"
+
+def test_stream_results(tmp_path):
+    output_file = tmp_path / "results.jsonl"
+    results = ({'id': i} for i in range(5))
+    
+    assert stream_results(results, output_file, buffer_size=2) == 5
+    assert [r['id'] for r in load_results(output_file)] == list(range(5))
+
+
+def test_repair_results_drops_truncated_last_line(tmp_path):
+    output_file = tmp_path / "results.jsonl"
+    stream_results(({'id': i} for i in range(3)), output_file)
+    with open(output_file, 'a', encoding='utf-8') as f:
+        f.write('{"id": 3, "original_co')
+    
+    repair_results(output_file)
+    assert output_file.read_text(encoding='utf-8') == '{"id": 0}\n{"id": 1}\n{"id": 2}\n'
+    
+    # Results appended afterwards start on a line of their own
+    with JsonlResultsWriter(output_file, append=True) as writer:
+        writer.write({'id': 3})
+    assert [r['id'] for r in load_results(output_file)] == [0, 1, 2, 3]
+
+def test_repair_results_drops_truncated_line_longer_than_a_block(tmp_path):
+    output_file = tmp_path / "results.jsonl"
+    output_file.write_text('{"id": 0}\n{"adversarial_code": "' + 'x' * 200000, encoding='utf-8')
+    
+    repair_results(output_file)
+    assert output_file.read_text(encoding='utf-8') == '{"id": 0}\n'
+
+def test_repair_results_keeps_complete_line_without_newline(tmp_path):
+    output_file = tmp_path / "results.jsonl"
+    output_file.write_text('{"id": 0}\n{"id": 1}', encoding='utf-8')
+    
+    repair_results(output_file)
+    assert output_file.read_text(encoding='utf-8') == '{"id": 0}\n{"id": 1}\n'
+
+def test_repair_results_only_reads_the_last_line(tmp_path):
+    output_file = tmp_path / "results.jsonl"
+    content = '{"id": 0}\n{"id"\n' + ''.join(f'{{"id": {i}}}\n' for i in range(2, 20000))
+    output_file.write_text(content, encoding='utf-8')
+    
+    # Corruption before the end is left for load_results to report
+    repair_results(output_file)
+    assert output_file.read_text(encoding='utf-8') == content
+    with pytest.raises(ValueError):
+        list(load_results(output_file))
@@ -0,0 +1,46 @@
+import subprocess
+import sys
+
+import pytest
+
+from src.utils.import_time import (
+    HEAVY_MODULES, IMPORT_TIME_BUDGET, PROJECT_ROOT, measure_import, parse_importtime
+)
+
+def test_parse_importtime():
+    stderr = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       120 |        120 |   _io\n"
+        "import time:      1500 |       2000 | json\n"
+    )
+    entries = parse_importtime(stderr)
+    
+    assert [entry['module'] for entry in entries] == ['_io', 'json']
+    assert entries[0]['depth'] == 1
+    assert entries[1]['depth'] == 0
+    assert entries[1]['cumulative'] == pytest.approx(0.002)
+
+@pytest.mark.parametrize('module', [
+    'src.utils',
+    'src.utils.metrics',
+    'src.evaluation.metrics',
+    'src.attacks.attack',
+    'src.attack.attack',
+])
+def test_import_defers_heavy_dependencies(module):
+    report = measure_import(module)
+    
+    assert report['heavy_modules'] == []
+    assert report['total'] < IMPORT_TIME_BUDGET
+
+def test_cli_help_does_not_load_heavy_dependencies():
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', 'main.py', '--help'],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True
+    )
+    
+    assert result.returncode == 0
+    loaded = {entry['module'] for entry in parse_importtime(result.stderr)}
+    assert loaded.isdisjoint(HEAVY_MODULES)
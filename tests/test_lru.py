@@ -0,0 +1,25 @@
+from src.utils.lru import LRUCache, content_key
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+
+    assert "a" in cache
+    assert "b" not in cache
+    assert len(cache) == 2
+    assert cache.stats() == {"hits": 1, "misses": 0, "hit_rate": 1.0}
+
+
+def test_lru_cache_counts_rejected_entries_as_misses():
+    cache = LRUCache(4)
+    cache.put(content_key("x = 1"), (0.4, False))
+
+    assert cache.get(content_key("x = 1"), accept=lambda entry: entry[1]) is None
+    assert cache.get(content_key("y = 2"), default=0) == 0
+    assert cache.get(content_key("x = 1")) == (0.4, False)
+    assert cache.stats()["misses"] == 2
+    assert cache.stats()["hits"] == 1
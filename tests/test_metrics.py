@@ -1,10 +1,14 @@
 import pytest
 from src.utils.metrics import (
     calculate_similarity,
+    SimilarityEngine,
     calculate_attack_metrics,
+    IncrementalAttackMetrics,
     calculate_model_metrics,
-    calculate_embedding_similarity
+    calculate_embedding_similarity,
+    paired_embedding_similarity
 )
+import numpy as np
 import torch
 from transformers import AutoTokenizer
 
@@ -29,6 +33,34 @@ def test_calculate_similarity():
     assert calculate_similarity("", "") == 1.0
     assert calculate_similarity("def add():", "") < 1.0
 
+def test_similarity_engine_matches_calculate_similarity():
+    original = "def add(a, b): return a + b"
+    candidates = [
+        original,
+        "def add(a, b): return a - b",
+        "def subtract(x, y): return x - y",
+        "x = 1",
+        "",
+    ]
+    
+    exact = SimilarityEngine(original)
+    expected = [calculate_similarity(original, candidate) for candidate in candidates]
+    assert exact.score_batch(candidates).tolist() == expected
+    
+    # Bounded scores are exact above the threshold and below it otherwise
+    bounded = SimilarityEngine(original, threshold=0.6)
+    for candidate, similarity in zip(candidates, bounded.score_batch(candidates)):
+        if calculate_similarity(original, candidate) >= 0.6:
+            assert similarity == calculate_similarity(original, candidate)
+        else:
+            assert similarity < 0.6
+    assert bounded.stats()["early_exits"] > 0
+    
+    # Cached bounded scores are recomputed when the exact value is asked for
+    assert bounded.score("x = 1", bounded=False) == calculate_similarity(original, "x = 1")
+    bounded.score(original)
+    assert bounded.stats()["hits"] == 1
+
 def test_calculate_attack_metrics():
     results = [
         {
@@ -56,6 +88,21 @@ def test_calculate_attack_metrics():
     assert 0.0 <= metrics['code_similarity'] <= 1.0
     assert metrics['avg_perturbations'] > 0
 
+def test_incremental_attack_metrics_match_batch():
+    results = [
+        {'perturbations': 1, 'similarity': 0.8},
+        {'perturbations': 3, 'similarity': 0.4},
+        {'perturbations': 2, 'similarity': 0.7}
+    ]
+    
+    incremental = IncrementalAttackMetrics()
+    for result in results:
+        incremental.update(result)
+    
+    expected = calculate_attack_metrics(results)
+    for key, value in incremental.compute().items():
+        assert value == pytest.approx(expected[key])
+
 def test_calculate_model_metrics(tokenizer):
     model_outputs = [
         "def add(a, b): return a + b",
@@ -75,6 +122,40 @@ def test_calculate_model_metrics(tokenizer):
     assert 0.0 <= metrics['token_accuracy'] <= 1.0
     assert 0.0 <= metrics['bleu_score'] <= 1.0
 
+@pytest.mark.filterwarnings("ignore")
+def test_calculate_model_metrics_matches_per_pair_computation(tiny_mlm):
+    from nltk.translate.bleu_score import sentence_bleu
+    tokenizer = AutoTokenizer.from_pretrained(tiny_mlm)
+    
+    model_outputs = [
+        "def add(a, b): return a + b",
+        "def add(a, b): return a - b",
+        "total = count",
+        "return x * y",
+        "def multiply(x, y): return x * y * y",
+    ]
+    target_outputs = [
+        "def add(a, b): return a + b",
+        "def add(a, b): return a + b",
+        "total = count + value",
+        "def multiply(x, y): return x * y",
+        "def multiply(x, y): return x * y",
+    ]
+    
+    model_tokens = [tokenizer.tokenize(output) for output in model_outputs]
+    target_tokens = [tokenizer.tokenize(output) for output in target_outputs]
+    expected = {
+        'exact_match': np.mean([m == t for m, t in zip(model_tokens, target_tokens)]),
+        'token_accuracy': np.mean([
+            sum(1 for a, b in zip(m, t) if a == b) / max(len(m), len(t))
+            for m, t in zip(model_tokens, target_tokens)
+        ]),
+        'bleu_score': np.mean([sentence_bleu([t], m) for m, t in zip(model_tokens, target_tokens)])
+    }
+    
+    assert calculate_model_metrics(model_outputs, target_outputs, tokenizer) == expected
+    assert calculate_model_metrics(model_outputs, target_outputs, tokenizer, batch_size=2) == expected
+
 def test_calculate_embedding_similarity():
     # Create random embeddings
     emb1 = torch.randn(10, 768)
@@ -85,4 +166,29 @@ def test_calculate_embedding_similarity():
     
     # Test identical embeddings
     similarity = calculate_embedding_similarity(emb1, emb1)
-    assert similarity == 1.0 
\ No newline at end of file
+    assert similarity == 1.0
+
+def test_calculate_embedding_similarity_chunks_and_mean_path():
+    torch.manual_seed(0)
+    emb1 = torch.randn(7, 16)
+    emb2 = torch.randn(5, 16) + 0.5
+    
+    unit1 = torch.nn.functional.normalize(emb1, dim=-1)
+    unit2 = torch.nn.functional.normalize(emb2, dim=-1)
+    matrix = unit1 @ unit2.T
+    
+    assert calculate_embedding_similarity(emb1, emb2) == pytest.approx(float(matrix.clamp(0, 1).mean()))
+    assert calculate_embedding_similarity(emb1, emb2, chunk_size=2) == pytest.approx(float(matrix.clamp(0, 1).mean()))
+    assert calculate_embedding_similarity(emb1, emb2, clip=False) == pytest.approx(float(matrix.mean()))
+
+def test_paired_embedding_similarity():
+    torch.manual_seed(0)
+    emb1 = torch.randn(6, 16)
+    emb2 = torch.randn(6, 16)
+    
+    expected = torch.nn.functional.cosine_similarity(emb1, emb2, dim=-1)
+    assert torch.allclose(paired_embedding_similarity(emb1, emb2, chunk_size=4), expected, atol=1e-6)
+    assert torch.allclose(paired_embedding_similarity(emb1, emb1), torch.ones(6))
+    
+    with pytest.raises(ValueError):
+        paired_embedding_similarity(emb1, emb2[:3])
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+from src.attacks.attack import CodeAttack, PRECISION_PROFILES
+from src.evaluation.precision import _rank_correlation, _top_k_overlap, compare_precision_profiles
+
+def test_rank_correlation():
+    scores = np.array([0.1, 0.9, 0.5, 0.3])
+    
+    assert _rank_correlation(scores, scores * 2) == 1.0
+    assert _rank_correlation(scores, -scores) == pytest.approx(-1.0)
+    assert _rank_correlation(scores[:1], scores[:1]) == 1.0
+
+def test_top_k_overlap():
+    a = np.array([0.9, 0.8, 0.1, 0.0])
+    b = np.array([0.9, 0.0, 0.8, 0.1])
+    
+    assert _top_k_overlap(a, a, 2) == 1.0
+    assert _top_k_overlap(a, b, 2) == 0.5
+
+def test_unknown_precision_profile():
+    # The profile is checked before the model or tokenizer is touched
+    assert 'fp8' not in PRECISION_PROFILES
+    with pytest.raises(ValueError, match="Unknown precision profile"):
+        CodeAttack(model=object(), tokenizer=object(), precision='fp8')
+
+def test_compare_precision_profiles_runs_each_importance_pass_once(tiny_t5, monkeypatch):
+    model, tokenizer = tiny_t5
+    codes = ["def add(a, b): return a + b", "def invalid(:", "def multiply(x, y): return x * y"]
+    
+    passes = []
+    build = CodeAttack._build_importance_contexts
+    def counting_build(self, inputs, original_outputs):
+        passes.append(self.precision)
+        return build(self, inputs, original_outputs)
+    monkeypatch.setattr(CodeAttack, "_build_importance_contexts", counting_build)
+    
+    report = compare_precision_profiles(model, tokenizer, codes, profiles=('fp32', 'fp32'), batch_size=4)
+    
+    # One pass for the attacked batch and one for the invalid snippet, per profile
+    assert passes == ['fp32'] * 4
+    assert report['fp32_importance_rank_correlation'] == pytest.approx(1.0)
+    assert report['fp32_adversarial_change_rate'] == 0.0
@@ -0,0 +1,128 @@
+import pytest
+from src.attack.attack import CodeAttack
+from src.models.registry import ModelRegistry
+from src.models.query_cache import CachedQueryModel, QueryBudgetExceeded
+from src.models.target_model import TargetModel
+
+class CountingModel:
+    def __init__(self):
+        self.calls = []
+        self.batches = []
+    
+    def __call__(self, code):
+        if isinstance(code, list):
+            self.batches.append(code)
+            return [self(c) for c in code]
+        self.calls.append(code)
+        return len(code)
+
+def test_cached_query_model_memoizes_and_evicts():
+    model = CountingModel()
+    cached = CachedQueryModel(model, max_entries=2)
+    
+    assert cached("a") == 1
+    assert cached("a") == 1
+    assert model.calls == ["a"]
+    
+    cached("bb")
+    cached("ccc")
+    cached("a")
+    assert model.calls == ["a", "bb", "ccc", "a"]
+    
+    stats = cached.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 4
+    assert stats["cached"] == 2
+
+def test_cached_query_model_enforces_budget_per_sample():
+    cached = CachedQueryModel(CountingModel(), query_budget=2)
+    
+    cached("a")
+    cached("b")
+    # Cache hits are free
+    cached("a")
+    with pytest.raises(QueryBudgetExceeded):
+        cached("c")
+    
+    cached.start_sample()
+    cached("c")
+    assert cached.sample_queries == 1
+
+def test_find_vulnerable_tokens_queries_original_once():
+    model = CountingModel()
+    attack = CodeAttack(model=model)
+    code = "def add(a, b): return a + b"
+    
+    attack.model.start_sample()
+    attack.find_vulnerable_tokens(code)
+    
+    assert model.calls.count(code) == 1
+    assert len(model.calls) == len(code.split()) + 1
+
+def test_generate_respects_query_budget(tiny_mlm, tmp_path):
+    code = "def add(a, b): return a + b"
+    model = CountingModel()
+    attack = CodeAttack(
+        model=model, query_budget=3, mlm_name=tiny_mlm, registry=ModelRegistry(), table_cache_dir=str(tmp_path)
+    )
+    
+    result = attack.generate(code)
+    
+    assert result["queries"] == 3
+    assert len(model.calls) == 3
+
+def test_generate_reuses_cached_queries(tiny_mlm, tmp_path):
+    code = "def add(a, b): return a + b"
+    model = CountingModel()
+    attack = CodeAttack(model=model, mlm_name=tiny_mlm, registry=ModelRegistry(), table_cache_dir=str(tmp_path))
+    
+    assert attack.generate(code)["queries"] == len(code.split()) + 1
+    assert attack.generate(code)["queries"] == 0
+    assert attack.model.stats()["hits"] == len(code.split()) + 1
+
+def test_is_attack_successful_uses_original_code():
+    code = "def add(a, b): return a + b"
+    attack = CodeAttack(model=lambda code: code, query_budget=1)
+    
+    # Only the original fits in the budget
+    result = attack.generate(code)
+    assert result["queries"] == 1
+    
+    attack.model.start_sample()
+    assert not attack._is_attack_successful(code)
+    assert attack._is_attack_successful("def sub(x, y): return x - y")
+
+def test_query_batch_uses_cache_and_truncates_at_budget():
+    model = CountingModel()
+    cached = CachedQueryModel(model, query_budget=3)
+    
+    cached("a")
+    outputs = cached.query_batch(["a", "bb", "bb", "ccc", "dddd"])
+    
+    # "a" is cached and "bb" is queried once, so "dddd" does not fit
+    assert outputs == [1, 2, 2, 3]
+    assert model.batches == [["bb", "ccc"]]
+    assert cached.sample_queries == 3
+
+def test_find_vulnerable_tokens_batches_masked_variants():
+    model = CountingModel()
+    attack = CodeAttack(model=model, query_batch_size=3)
+    code = "def add(a, b): return a + b"
+    
+    attack.model.start_sample()
+    ranked = attack.find_vulnerable_tokens(code)
+    
+    assert [len(batch) for batch in model.batches] == [3, 3, 1]
+    # The model output is the length, so masking changes it by |len("[MASK]") - len(token)|
+    expected = sorted(
+        ((i, token, abs(len("[MASK]") - len(token))) for i, token in enumerate(code.split())),
+        key=lambda x: x[2], reverse=True
+    )[:attack.max_perturbations]
+    assert [(i, token, int(score)) for i, token, score in ranked] == expected
+
+def test_target_model_stacks_batched_outputs():
+    model = TargetModel()
+    outputs = model(["a b", "[MASK] b"])
+    
+    assert outputs.shape == (2, 1)
+    assert outputs[1, 0] == model("[MASK] b")[0]
@@ -0,0 +1,59 @@
+import torch
+from src.attack.attack import CodeAttack
+from src.models.registry import ModelRegistry
+from src.models.target_model import TargetModel
+
+class FakePretrained(torch.nn.Linear):
+    loads = 0
+    
+    @classmethod
+    def from_pretrained(cls, name, **kwargs):
+        cls.loads += 1
+        return cls(256, 256)
+
+def test_registry_loads_lazily_and_shares_models():
+    FakePretrained.loads = 0
+    registry = ModelRegistry()
+    
+    attacks = [CodeAttack(model=TargetModel(), registry=registry) for _ in range(3)]
+    assert FakePretrained.loads == 0
+    
+    models = [registry.get_model("fake", model_class=FakePretrained) for _ in attacks]
+    assert FakePretrained.loads == 1
+    assert all(model is models[0] for model in models)
+    
+    # A different dtype is a different entry
+    registry.get_model("fake", model_class=FakePretrained, dtype=torch.float64)
+    assert FakePretrained.loads == 2
+
+def test_registry_memory_cap_evicts_least_recently_used():
+    FakePretrained.loads = 0
+    model_size = 256 * 256 * 4 + 256 * 4
+    registry = ModelRegistry(memory_cap=2 * model_size)
+    
+    registry.get_model("a", model_class=FakePretrained)
+    registry.get_model("b", model_class=FakePretrained)
+    registry.get_model("a", model_class=FakePretrained)
+    registry.get_model("c", model_class=FakePretrained)
+    
+    assert [key[0] for key in registry.loaded()] == ["a", "c"]
+    assert registry.memory_usage() <= registry.memory_cap
+
+def test_registry_evict_idle(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("src.models.registry.time.monotonic", lambda: now[0])
+    
+    registry = ModelRegistry()
+    registry.get_model("a", model_class=FakePretrained)
+    now[0] = 130.0
+    registry.get_model("b", model_class=FakePretrained)
+    
+    now[0] = 160.0
+    assert registry.evict_idle(max_idle_seconds=60) == 0
+    assert registry.evict_idle(max_idle_seconds=45) == 1
+    assert [key[0] for key in registry.loaded()] == ["b"]
+    
+    # Idle for exactly max_idle_seconds is not yet evicted
+    assert registry.evict_idle(max_idle_seconds=30) == 0
+    assert registry.evict_idle(max_idle_seconds=29) == 1
+    assert registry.loaded() == []
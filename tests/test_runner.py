@@ -0,0 +1,22 @@
+import pytest
+from src.utils.data_loader import shard_bounds
+from src.utils.runner import parse_shard
+
+def test_parse_shard():
+    assert parse_shard("0/4") == (0, 4)
+    assert parse_shard("3/4") == (3, 4)
+    
+    with pytest.raises(ValueError):
+        parse_shard("4/4")
+    with pytest.raises(ValueError):
+        parse_shard("1-4")
+
+def test_shard_bounds_cover_dataset():
+    num_items = 10
+    bounds = [shard_bounds(num_items, i, 3) for i in range(3)]
+    
+    # Shards are contiguous, disjoint and differ in size by at most one item
+    assert bounds == [(0, 4), (4, 7), (7, 10)]
+    
+    # More shards than items leaves the trailing shards empty
+    assert shard_bounds(2, 3, 4) == (2, 2)
@@ -0,0 +1,64 @@
+import pytest
+from src.attack.attack import CodeAttack
+from src.attack.substitutes import MLMSubstituteEngine
+from src.constraints.code_constraints import CodeConstraints
+from src.models.registry import ModelRegistry
+from src.models.target_model import TargetModel
+
+CODE = "def add(a, b): return a + b"
+
+@pytest.fixture
+def engine(tiny_mlm, tmp_path):
+    return MLMSubstituteEngine(mlm_name=tiny_mlm, registry=ModelRegistry(), top_k=20, table_cache_dir=str(tmp_path))
+
+def test_substitutes_are_filtered_whole_words(engine):
+    positions = [2, 4]
+    substitutes = engine.generate("total = count + value", positions)
+    
+    assert set(substitutes) == set(positions)
+    constraints = CodeConstraints()
+    for position, original in zip(positions, ["count", "value"]):
+        for substitute in substitutes[position]:
+            assert substitute != original
+            assert constraints._get_token_class(substitute) == "identifier"
+            assert substitute not in constraints.keywords["python"]
+
+def test_all_positions_share_one_forward_pass(engine):
+    calls = []
+    model = engine.model
+    model.register_forward_hook(lambda module, args, output: calls.append(1))
+    
+    engine.generate(CODE, [1, 2, 3, 6])
+    assert len(calls) == 1
+
+def test_substitutes_are_cached_per_context_and_position(engine):
+    first = engine.generate(CODE, [2, 3])
+    again = engine.generate(CODE, [3, 2])
+    
+    assert first == again
+    assert engine.stats()["hits"] == 2
+    
+    engine.generate(CODE + " ", [2])
+    assert engine.stats()["misses"] == 3
+
+def test_generate_uses_mlm_substitutes(tiny_mlm, tmp_path):
+    attack = CodeAttack(
+        model=TargetModel(), mlm_name=tiny_mlm, registry=ModelRegistry(), top_k=20, table_cache_dir=str(tmp_path)
+    )
+    result = attack.generate(CODE)
+    
+    assert result["original_code"] == CODE
+    assert result["perturbations"] <= attack.max_perturbations
+
+def test_vocab_table_restricts_logits(tiny_mlm, tmp_path):
+    unmasked = MLMSubstituteEngine(
+        mlm_name=tiny_mlm, registry=ModelRegistry(), top_k=5, use_vocab_table=False
+    )
+    masked = MLMSubstituteEngine(
+        mlm_name=tiny_mlm, registry=ModelRegistry(), top_k=5, table_cache_dir=str(tmp_path)
+    )
+    code = "total = count + value"
+    
+    # Masking before top-k keeps every slot for a word the filter accepts
+    assert len(masked.generate(code, [2])[2]) >= len(unmasked.generate(code, [2])[2])
+    assert all(substitute.isidentifier() for substitute in masked.generate(code, [2])[2])
@@ -0,0 +1,39 @@
+import pytest
+from src.constraints.code_constraints import CodeConstraints
+from src.utils.tokenizer import CodeTokenizer, KEYWORDS
+
+def test_tokenize_with_types_spans():
+    tokenizer = CodeTokenizer()
+    code = 'if (count >= 10.5) { name = "a b"; }'
+    
+    typed = tokenizer.tokenize_with_types(code)
+    
+    assert [text for text, _, _ in typed] == tokenizer.tokenize(code)
+    assert all(code[start:end] == text for text, _, (start, end) in typed)
+    assert [token_type for _, token_type, _ in typed] == [
+        "keyword", "bracket", "identifier", "operator", "number", "bracket",
+        "bracket", "identifier", "operator", "string", "unknown", "bracket"
+    ]
+
+def test_tokenize_keeps_sliced_matching_semantics():
+    tokenizer = CodeTokenizer()
+    
+    # A keyword may follow a digit, as when every position was matched on its own
+    assert tokenizer.tokenize("1int x") == ["1", "int", "x"]
+    assert tokenizer.tokenize("xint double doable") == ["xint", "double", "doable"]
+    assert tokenizer.tokenize("1.5x a.b 3.14") == ["1", ".", "5", "x", "a", ".", "b", "3.14"]
+
+@pytest.mark.parametrize("language", sorted(KEYWORDS))
+def test_keywords_per_language(language):
+    tokenizer = CodeTokenizer(language)
+    
+    for keyword in KEYWORDS[language]:
+        assert tokenizer.get_token_type(keyword) == "keyword"
+    assert CodeConstraints().keywords[language] == KEYWORDS[language]
+
+def test_python_keywords_are_not_java_keywords():
+    assert CodeTokenizer("python").get_token_type("def") == "keyword"
+    assert CodeTokenizer("java").get_token_type("def") == "identifier"
+    
+    with pytest.raises(ValueError):
+        CodeTokenizer("cobol")
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+from transformers import AutoTokenizer
+from src.constraints.code_constraints import CodeConstraints
+from src.constraints.vocab_table import VocabConstraintTable
+from src.utils.tokenizer import KEYWORDS
+
+@pytest.fixture
+def tokenizer(tiny_mlm):
+    return AutoTokenizer.from_pretrained(tiny_mlm)
+
+@pytest.fixture
+def table(tokenizer, tmp_path):
+    return VocabConstraintTable.load_or_build(tokenizer, cache_dir=str(tmp_path))
+
+@pytest.mark.parametrize("original", ["count", "total", "+", "-", "(", "10", "b):"])
+def test_allowed_mask_matches_filter_substitutes(tokenizer, table, original):
+    constraints = CodeConstraints()
+    mask = table.allowed_mask(original, "python")
+    
+    for token_id, token in enumerate(tokenizer.convert_ids_to_tokens(list(range(len(tokenizer))))):
+        if table.special[token_id] or not table.word_start[token_id]:
+            assert not mask[token_id]
+            continue
+        
+        text = tokenizer.convert_tokens_to_string([token]).strip()
+        if text == original:
+            # Left to the final filter on whole words
+            continue
+        expected = bool(constraints.filter_substitutes(original, [text])) and text not in KEYWORDS["python"]
+        assert mask[token_id] == expected, text
+
+def test_table_is_cached_on_disk(tokenizer, table, tmp_path, monkeypatch):
+    assert len(list(tmp_path.glob("*.npz"))) == 1
+    
+    def fail(*args, **kwargs):
+        raise AssertionError("table was rebuilt")
+    monkeypatch.setattr(VocabConstraintTable, "build", fail)
+    
+    loaded = VocabConstraintTable.load_or_build(tokenizer, cache_dir=str(tmp_path))
+    assert np.array_equal(loaded.class_ids, table.class_ids)
+    assert np.array_equal(loaded.allowed_mask("count", "python"), table.allowed_mask("count", "python"))
+
+def test_continuation_mask_excludes_word_starts(table):
+    continuation = table.continuation_mask()
+    
+    assert continuation.any()
+    assert not (continuation & table.word_start).any()
+    assert not (continuation & table.special).any()